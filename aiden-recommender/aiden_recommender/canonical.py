@@ -0,0 +1,104 @@
+import json
+import re
+from functools import cached_property
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel
+from unidecode import unidecode
+
+GAZETTEER_PATH = Path(__file__).parent / "data" / "gazetteer.json"
+
+# Location noise around place names: postal and department codes, arrondissements, cedex and the country
+LOCATION_NOISE = re.compile(r"\b(\d{5}|\d{2,3}|2a|2b|\d+(er|e|eme)?\s*arrondissement|\d+(er|e|eme)|cedex|france)\b")
+NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+ABBREVIATIONS = {"st": "saint", "ste": "sainte"}
+
+
+def fold(text: str) -> str:
+    """Folds case and accents, trims and collapses whitespace."""
+    return " ".join(unidecode(text).casefold().split())
+
+
+def _place_key(text: str) -> str:
+    words = NON_ALPHANUMERIC.sub(" ", fold(text)).split()
+    return " ".join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+class Place(BaseModel):
+    id: str
+    name: str
+    kind: str
+    lat: float
+    lng: float
+    aliases: list[str] = []
+
+
+class Gazetteer:
+    """
+    Offline index of the places searched most, each with a canonical id, name and position.
+    Names and aliases are matched once folded, without punctuation, postal codes, arrondissements or country.
+    Scrapers receive the name of a place and caches are keyed by its id, so a name must identify a single place.
+    """
+
+    def __init__(self, path: Path = GAZETTEER_PATH):
+        self.path = path
+
+    @cached_property
+    def places(self) -> dict[str, Place]:
+        # Loaded on first lookup, importing the module reads nothing
+        places = {place.id: place for place in (Place(**entry) for entry in json.loads(self.path.read_text()))}
+        names: dict[str, str] = {}
+        for place in places.values():
+            if (other := names.setdefault(_place_key(place.name), place.id)) != place.id:
+                raise ValueError(f"Places {other} and {place.id} of {self.path} share the name {place.name}")
+        return places
+
+    @cached_property
+    def index(self) -> dict[str, Place]:
+        # Names first, an alias never shadows the name of another place
+        index = {_place_key(place.name): place for place in self.places.values()}
+        for place in self.places.values():
+            for alias in place.aliases:
+                index.setdefault(_place_key(alias), place)
+        return index
+
+    def get(self, place_id: str) -> Optional[Place]:
+        return self.places.get(place_id)
+
+    def find(self, location: str) -> Optional[Place]:
+        # "Paris 15e, Île-de-France, France" is tried part by part, the most precise part first
+        for part in location.split(","):
+            key = _place_key(part)
+            if (place := self.index.get(key)) is not None:
+                return place
+            if (place := self.index.get(" ".join(LOCATION_NOISE.sub(" ", key).split()))) is not None:
+                return place
+        return None
+
+
+gazetteer = Gazetteer()
+
+
+def canonical_query(search_query: str) -> str:
+    # Punctuation is kept, it is part of queries like c++, c# or node.js
+    return fold(search_query)
+
+
+def canonical_location(location: str) -> str:
+    """Name of the gazetteer place of location, or the folded location when it is not in the gazetteer."""
+    if (place := gazetteer.find(location)) is not None:
+        return place.name
+    return fold(location)
+
+
+def location_key(location: str) -> str:
+    """Id of the gazetteer place of location, the form of a location in cache and cursor keys, or the folded location when unknown."""
+    if (place := gazetteer.find(location)) is not None:
+        return place.id
+    return fold(location)
+
+
+def canonical_search(search_query: str, location: str) -> tuple[str, str]:
+    """The form of a search shared by the scrapers and every cache key, so that spelling variants of a search hit the same entries."""
+    return canonical_query(search_query), canonical_location(location)
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class EventLoopMonitor:
+    """
+    Measures the event loop lag: how late a task scheduled every interval seconds actually wakes up.
+    A high lag means some callback is hogging the loop and delaying every other in-flight request.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+        self.samples = 0
+        self.last_lag = 0.0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.samples += 1
+            self.total_lag += self.last_lag
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "last_lag": self.last_lag,
+            "mean_lag": self.total_lag / self.samples if self.samples else 0.0,
+            "max_lag": self.max_lag,
+        }
+
+
+event_loop_monitor = EventLoopMonitor()
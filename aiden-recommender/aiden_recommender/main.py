@@ -1,14 +1,26 @@
-from typing import Annotated
+from typing import Annotated, AsyncIterator, Optional
 from uuid import UUID, uuid4
 
 from fastapi import FastAPI, BackgroundTasks
 from fastapi.params import Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from redis.exceptions import ConnectionError
 
+from aiden_recommender.scrapers import wtj_scraper
 from aiden_recommender.scrapers.scraper_aggregator import scraper_aggregator
+from aiden_recommender.scrapers.wtj.geocoding import geocoder
+from aiden_recommender.scrapers.scrape_progress import ScrapeProgress
 from aiden_recommender.form_finder.form_finder import get_form_cached, Form
-from aiden_shared.tools import redis_client
+from aiden_recommender.event_loop_monitor import event_loop_monitor
+from aiden_recommender.parsing_pool import parsing_pool
+from aiden_recommender.query_cache import semantic_query_cache
+from aiden_recommender.rate_limiter import limiters
+from aiden_recommender.upsert_buffer import qdrant_upsert_buffer
+from aiden_recommender.user_vectors import user_vector_cache
+from aiden_recommender.zyte_client import zyte_client
+from aiden_shared.constants import JOB_COLLECTION
+from aiden_shared.tools import acreate_collections, redis_client
 from aiden_shared.models import JobOffer
 
 app = FastAPI()
@@ -19,6 +31,13 @@ class JobOfferRequest(BaseModel):
     query: str
     limit: int
     start_index: int
+    priority: Optional[int] = None
+    profile_id: Optional[UUID] = None
+
+
+class JobOfferStreamRequest(JobOfferRequest):
+    # References of the offers already shown to the user
+    exclude: list[str] = []
 
 
 class FormRequest(BaseModel):
@@ -30,10 +49,6 @@ class ScrapeResponse(BaseModel):
     scrape_id: UUID
 
 
-class ScrapeStatusResponse(BaseModel):
-    status: str
-
-
 @app.get("/health", status_code=200)
 def healthcheck() -> dict[str, str]:
     try:
@@ -57,6 +72,8 @@ async def recommend(job_offer_request: Annotated[JobOfferRequest, Body()]) -> li
 @app.post("/scrape", response_model=ScrapeResponse)
 async def scrape(job_offer_request: Annotated[JobOfferRequest, Body()], background_tasks: BackgroundTasks):
     scrape_id = uuid4()
+    # Reported as in progress right away, whichever process the first status poll lands on
+    await scraper_aggregator.progress.start(scrape_id)
     background_tasks.add_task(
         scraper_aggregator.scrape,
         scrape_id,
@@ -64,22 +81,71 @@ async def scrape(job_offer_request: Annotated[JobOfferRequest, Body()], backgrou
         job_offer_request.location,
         job_offer_request.limit,
         job_offer_request.start_index,
+        job_offer_request.priority,
     )
     return ScrapeResponse(status="Scraping started", scrape_id=scrape_id)
 
 
-@app.get("/scrape_status/{scrape_id}", response_model=ScrapeStatusResponse)
-async def scrape_status(scrape_id: UUID):
-    status = scraper_aggregator.get_scrape_status(scrape_id)
-    return ScrapeStatusResponse(status=status)
+@app.post("/scrape/stream")
+async def scrape_stream(job_offer_request: Annotated[JobOfferStreamRequest, Body()]) -> StreamingResponse:
+    """Scrapes the search and streams its ranked offers as newline delimited RankedJobOffer json, as soon as they are ingested."""
+
+    async def ranked_offers() -> AsyncIterator[str]:
+        async for ranked_offer in scraper_aggregator.stream_jobs(
+            search_query=job_offer_request.query,
+            location=job_offer_request.location,
+            profile_embedding_id=job_offer_request.profile_id,
+            num_results=job_offer_request.limit,
+            start_index=job_offer_request.start_index,
+            exclude=job_offer_request.exclude,
+            priority=job_offer_request.priority,
+        ):
+            yield ranked_offer.model_dump_json() + "\n"
+
+    return StreamingResponse(ranked_offers(), media_type="application/x-ndjson")
+
+
+@app.get("/scrape_status/{scrape_id}", response_model=ScrapeProgress)
+async def scrape_status(scrape_id: UUID) -> ScrapeProgress:
+    return await scraper_aggregator.get_scrape_status(scrape_id)
+
+
+@app.get("/metrics")
+async def metrics() -> dict[str, dict[str, float]]:
+    return {
+        "request_scheduler": scraper_aggregator.request_queue.stats(),
+        "single_flight": scraper_aggregator.single_flight.stats(),
+        "qdrant_upsert_buffer": qdrant_upsert_buffer.stats(),
+        "parsing_pool": parsing_pool.stats(),
+        "user_vector_cache": user_vector_cache.stats(),
+        "semantic_query_cache": semantic_query_cache.stats(),
+        "event_loop": event_loop_monitor.stats(),
+        "zyte_client": zyte_client.stats(),
+        "wtj_start_params": wtj_scraper.start_params_cache.stats(),
+        "wtj_geocoder": geocoder.stats(),
+        **{f"{name}_limiter": limiter.stats() for name, limiter in limiters.items()},
+    }
 
 
 @app.on_event("startup")
 async def on_startup():
+    # Clients are created lazily, this is the first place the recommender talks to Qdrant
+    await acreate_collections(JOB_COLLECTION)
+    event_loop_monitor.start()
+    # Loads the WTJ start params in the background, startup doesn't wait for Zyte
+    wtj_scraper.start_params_cache.start()
     await scraper_aggregator.start_workers()
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await qdrant_upsert_buffer.flush()
+    await scraper_aggregator.progress.flush()
+    parsing_pool.shutdown()
+    await zyte_client.close()
+
+
 @app.post("/get_form", response_model=Form)
 async def get_form_schema(form_request: Annotated[FormRequest, Body()]) -> Form:
-    form = get_form_cached(form_request.job_reference)
+    form = await get_form_cached(form_request.job_reference)
     return form
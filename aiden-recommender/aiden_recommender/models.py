@@ -1,27 +1,50 @@
 from __future__ import annotations
 from datetime import timedelta
+from enum import IntEnum
 import json
-from typing import AsyncGenerator, Callable, Optional, Any
+from contextlib import nullcontext
+from typing import AsyncGenerator, Callable, ClassVar, Optional, Any
 from aiden_shared.models import JobOffer
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from abc import ABC, abstractmethod
 from mistralai.models.embeddings import EmbeddingObject
 from qdrant_client.models import PointStruct
-from aiden_shared.constants import JOB_COLLECTION
-from aiden_shared.tools import async_redis_client, async_mistral_client, async_qdrant_client
-from aiden_recommender.tools import async_zyte_client
+from aiden_shared.embeddings import embedding_store
+from aiden_shared.tools import async_redis_client
+from aiden_recommender.parsing_pool import parsing_pool
+from aiden_recommender.rate_limiter import limiters
+from aiden_recommender.upsert_buffer import qdrant_upsert_buffer
+from aiden_recommender.zyte_client import zyte_client
 import hashlib
 import uuid
+from uuid import UUID
 
 
 def reference_to_uuid(reference: str) -> uuid.UUID:
     return uuid.UUID(hashlib.md5(reference.encode()).hexdigest())
 
 
+class Priority(IntEnum):
+    """Scheduling priority of a request, lower values are served first."""
+
+    INGEST = 0  # embedding and upsert steps that make scraped offers searchable
+    FIRST_PAGE = 1  # first page of a user's search
+    DEFAULT = 2  # detail pages and other follow ups
+    PAGINATION = 3  # deeper pages of a search
+
+
 class Request(BaseModel, ABC):
     callback: Optional[Callable] = None
     retention_period: timedelta = timedelta(hours=12)
+    # Scrapes waiting for this request, follow up requests inherit them
+    scrape_ids: set[UUID] = Field(default_factory=set)
+    # Follow up requests without a priority inherit the one of the request that yielded them
+    priority: Optional[int] = None
+    # Name of the upstream API called by get_coroutine, its limiter throttles the calls
+    upstream: ClassVar[Optional[str]] = None
+    # Whether the callback is CPU bound enough to run in the parsing pool rather than on the event loop
+    offload_parsing: ClassVar[bool] = False
 
     @abstractmethod
     def _generate_cache_keys(self) -> list[str]:
@@ -31,36 +54,62 @@ class Request(BaseModel, ABC):
     def get_coroutine(self, is_cached):
         pass
 
+    async def check_cache(self, cache_keys: list[str]) -> list[bool]:
+        # One pipelined round trip whatever the number of keys
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for key in cache_keys:
+                pipe.exists(key)
+            return [bool(exists) for exists in await pipe.execute()]
+
+    async def commit_cache(self, cache_keys: list[str]) -> None:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for key in cache_keys:
+                pipe.setex(key, self.retention_period, 1)
+            await pipe.execute()
+
     async def send(self) -> AsyncGenerator[JobOffer | Request]:
-        is_cached = [await async_redis_client.exists(key) for key in self._generate_cache_keys()]
+        cache_keys = self._generate_cache_keys()
+        is_cached = await self.check_cache(cache_keys)
         if False in is_cached:
-            response = await self.get_coroutine(is_cached)
+            async with limiters[self.upstream].slot() if self.upstream else nullcontext():
+                response = await self.get_coroutine(is_cached)
             if response and self.callback:
-                for next_item in self.callback(response):
+                items = await parsing_pool.parse(self.callback, response) if self.offload_parsing else self.callback(response)
+                for next_item in items:
                     yield next_item
-            for key in self._generate_cache_keys():
-                await async_redis_client.setex(key, self.retention_period, 1)
+            await self.commit_cache(cache_keys)
 
 
 class ZyteRequest(Request):
     query: dict[str, Any]
+    offload_parsing: ClassVar[bool] = True
 
     def get_coroutine(self, is_cached):
-        return async_zyte_client.get(query=self.query)
+        # The client takes a zyte limiter slot per attempt, a throttled attempt gives it back before the call is retried
+        return zyte_client.get(self.query)
 
     def _generate_cache_keys(self) -> str:
-        return [f"zyte-request-{json.dumps(self.query)}"]
+        # Sorted, so that queries built in a different order share their cache entry
+        return [f"zyte-request-{json.dumps(self.query, sort_keys=True)}"]
 
 
 class MistralEmbeddingRequest(Request):
     input: list["JobOffer"]
     retention_period: timedelta = timedelta(days=365)
+    priority: Optional[int] = Priority.INGEST
 
     def get_coroutine(self, is_cached):
+        return self._embed(is_cached)
+
+    async def _embed(self, is_cached: list[bool]) -> list[EmbeddingObject]:
         # We only want to embed the items that are not already cached
-        return async_mistral_client.embeddings(
-            model="mistral-embed", input=[item.metadata_repr() for item, cache in zip(self.input, is_cached) if not cache]
+        positions = [position for position, cache in enumerate(is_cached) if not cache]
+        # The mistral limiter slot is only held by the Mistral call, not by the lookups of vectors already stored
+        vectors = await embedding_store.aembed(
+            [self.input[position].metadata_repr() for position in positions], slot=limiters["mistral"].slot
         )
+        # Each embedding points back to its item in self.input, so that callbacks can match them even if some items were cached
+        return [EmbeddingObject(object="embedding", embedding=vector, index=position) for vector, position in zip(vectors, positions)]
 
     def _generate_cache_keys(self) -> str:
         return [f"mistal-embed-{item.reference}" for item in self.input]
@@ -70,10 +119,10 @@ class QdrantRequest(Request):
     embeddings: list[EmbeddingObject]
     job_offers: list["JobOffer"]
     retention_period: timedelta = timedelta(days=365)
+    priority: Optional[int] = Priority.INGEST
 
     def get_coroutine(self, is_cached):
-        return async_qdrant_client.upload_points(
-            collection_name=JOB_COLLECTION,
+        return qdrant_upsert_buffer.upsert(
             points=[
                 PointStruct(id=reference_to_uuid(job_offer.reference).hex, vector=embedding.embedding, payload=job_offer.model_dump())
                 for job_offer, embedding, cache in zip(self.job_offers, self.embeddings, is_cached)
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+
+from aiden_recommender.serialization import dumps, loads
+
+
+def _init_worker() -> None:
+    # Registers the scrapers owning the callbacks, a no-op when the worker is forked from an already initialised process
+    import aiden_recommender.scrapers  # noqa: F401
+
+
+def _parse_in_worker(callback_data: str, response: Any) -> str:
+    callback = loads(callback_data)
+    # Follow up requests carry callbacks too, so the items come back serialized the same way
+    return dumps(list(callback(response)))
+
+
+class ParsingPool:
+    """
+    Runs the callbacks parsing upstream responses in a pool of processes, so that building DOM trees and parsing
+    large scripts doesn't stall the event loop. Callbacks and the items they yield cross the process boundary
+    serialized like the requests of the distributed queue. With zero processes the callbacks run inline.
+    """
+
+    def __init__(self, processes: int = int(os.getenv("PARSER_PROCESSES", min(4, os.cpu_count() or 1)))):
+        self.processes = processes
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.parsed = 0
+        self.total_parse_time = 0.0
+        self.max_parse_time = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use, importing the module doesn't spawn anything
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker)
+        return self.executor
+
+    async def parse(self, callback: Callable, response: Any) -> Iterable[Any]:
+        if self.processes <= 0:
+            return callback(response)
+        start = time.perf_counter()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            items = await loop.run_in_executor(self._get_executor(), _parse_in_worker, dumps(callback), response)
+        finally:
+            self.in_flight -= 1
+        parse_time = time.perf_counter() - start
+        self.parsed += 1
+        self.total_parse_time += parse_time
+        self.max_parse_time = max(self.max_parse_time, parse_time)
+        return loads(items)
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "processes": self.processes,
+            "in_flight": self.in_flight,
+            "parsed_responses": self.parsed,
+            "mean_parse_time": self.total_parse_time / self.parsed if self.parsed else 0.0,
+            "max_parse_time": self.max_parse_time,
+        }
+
+
+parsing_pool = ParsingPool()
@@ -0,0 +1,126 @@
+import math
+import os
+import re
+import time
+from datetime import timedelta
+
+from loguru import logger
+
+from aiden_shared.embeddings import embedding_store
+from aiden_shared.tools import async_redis_client
+from aiden_recommender.canonical import fold, location_key
+from aiden_recommender.rate_limiter import limiters
+
+
+# Words that don't change what a search is about
+FILLER_WORDS = set("a au aux de des du en et for h f in job la le les of offre poste the".split())
+# Spellings of the same role
+SYNONYMS = {"dev": "developer", "developpeur": "developer", "developpeuse": "developer", "ingenieur": "engineer"}
+# Terms keep the characters of names like c++, c# or node.js
+TERM = re.compile(r"[a-z0-9+#.]+")
+
+
+def query_terms(search_query: str) -> frozenset[str]:
+    """Terms a search is about: its words without filler, in the singular, with the spellings of a role mapped to one."""
+    terms = set()
+    for word in TERM.findall(fold(search_query)):
+        word = word.strip(".")
+        if len(word) > 4 and word.isalpha() and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        if word and word not in FILLER_WORDS:
+            terms.add(SYNONYMS.get(word, word))
+    return frozenset(terms)
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+
+class SemanticQueryCache:
+    """
+    Remembers the queries recently crawled in each place, so that a near duplicate search reuses their crawl.
+    A search whose embedding is within threshold of a query crawled in the same place less than freshness ago
+    is crawled under that query: its pagination cursors skip the results already crawled, and deeper pages extend them.
+    Only queries about the same terms are compared, "python dev in lyon" may reuse the crawl of "python developer" but
+    "java developer" never does: short texts of different jobs can embed closer than the threshold.
+    The crawl times are shared by every process through one Redis hash per place, the vectors are the query embeddings
+    already stored by the embedding store.
+    """
+
+    def __init__(
+        self,
+        threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95)),
+        freshness: timedelta = timedelta(seconds=int(os.getenv("SEMANTIC_CACHE_FRESHNESS", 24 * 3600))),
+        max_candidates: int = 50,
+    ):
+        self.threshold = threshold
+        self.freshness = freshness
+        # Only the latest queries of a place are compared, the cost of a lookup doesn't grow with its popularity
+        self.max_candidates = max_candidates
+        self.hits = 0
+        self.near_duplicate_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(location: str) -> str:
+        return f"semantic-queries-{location_key(location)}"
+
+    @staticmethod
+    def _text(search_query: str, location: str) -> str:
+        # The text embedded for the search vector, its embedding is usually already stored
+        return search_query + " " + location
+
+    async def _fresh_queries(self, location: str) -> dict[str, float]:
+        crawled_at = await async_redis_client.hgetall(self._key(location))
+        oldest = time.time() - self.freshness.total_seconds()
+        fresh = {query.decode(): float(at) for query, at in crawled_at.items() if float(at) >= oldest}
+        return dict(sorted(fresh.items(), key=lambda item: item[1], reverse=True)[: self.max_candidates])
+
+    async def resolve(self, search_query: str, location: str) -> str:
+        """Query a search in location is crawled under: the most similar fresh query of the place, or search_query itself."""
+        try:
+            fresh = await self._fresh_queries(location)
+            if search_query in fresh:
+                self.hits += 1
+                return search_query
+            terms = query_terms(search_query)
+            candidates = [query for query in fresh if query_terms(query) == terms]
+            if candidates:
+                texts = [self._text(query, location) for query in (search_query, *candidates)]
+                vector, *vectors = await embedding_store.aembed(texts, slot=limiters["mistral"].slot)
+                similarity, query = max((cosine_similarity(vector, other), query) for query, other in zip(candidates, vectors))
+                if similarity >= self.threshold:
+                    logger.info(f"Crawling {search_query} in {location} as {query}, similarity {similarity:.3f}")
+                    self.hits += 1
+                    self.near_duplicate_hits += 1
+                    return query
+        except Exception as e:
+            # The search is crawled under its own query
+            logger.error(f"Semantic query cache lookup failed: {e}")
+        self.misses += 1
+        return search_query
+
+    async def add(self, search_query: str, location: str) -> None:
+        """Records that search_query has just been crawled in location."""
+        key = self._key(location)
+        oldest = time.time() - self.freshness.total_seconds()
+        stale = [query for query, at in (await async_redis_client.hgetall(key)).items() if float(at) < oldest]
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            if stale:
+                pipe.hdel(key, *stale)
+            pipe.hset(key, search_query, time.time())
+            pipe.expire(key, self.freshness)
+            await pipe.execute()
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_duplicate_hits": self.near_duplicate_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+semantic_query_cache = SemanticQueryCache()
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+# Status by which upstreams tell us to slow down, server errors (5xx) are taken as the same signal
+THROTTLING_STATUS = 429
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    # aiohttp and zyte-api errors expose `status`, qdrant errors `status_code` and mistral errors `http_status`
+    for attribute in ("status", "status_code", "http_status"):
+        if isinstance(status := getattr(error, attribute, None), int):
+            return status == THROTTLING_STATUS or 500 <= status < 600
+    return False
+
+
+class UpstreamLimiter:
+    """
+    Token bucket plus adaptive concurrency cap guarding the calls made to one upstream API.
+    A call waits for a free concurrency slot, then for a token. Tokens are refilled at `rate` per second, up to `burst`.
+
+    The concurrency cap follows an AIMD law between min_concurrency and max_concurrency: it grows by one slot per window of
+    successful calls answered within target_latency, and is multiplied by `backoff` when the upstream throttles us or answers slower.
+    It starts at initial_concurrency, min_concurrency by default, and only grows as the upstream proves it can take more calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        target_latency: float = 5.0,
+        backoff: float = 0.5,
+        initial_concurrency: Optional[int] = None,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.backoff = backoff
+        initial_concurrency = min_concurrency if initial_concurrency is None else initial_concurrency
+        self.concurrency_limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self.last_decrease_at = 0.0
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.in_flight = 0
+        self.slot_released = asyncio.Condition()
+        self.token_lock = asyncio.Lock()
+        self.calls = 0
+        self.throttled_calls = 0
+        self.slow_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+        self.total_latency = 0.0
+
+    @classmethod
+    def from_env(
+        cls, name: str, rate: float, burst: int, max_concurrency: int, min_concurrency: int = 1, target_latency: float = 5.0
+    ) -> "UpstreamLimiter":
+        # e.g. ZYTE_RATE_LIMIT, ZYTE_BURST, ZYTE_MIN_CONCURRENCY, ZYTE_MAX_CONCURRENCY and ZYTE_TARGET_LATENCY configure the zyte limiter,
+        # ZYTE_INITIAL_CONCURRENCY the concurrency it starts from
+        prefix = name.upper()
+        initial_concurrency = os.getenv(f"{prefix}_INITIAL_CONCURRENCY")
+        return cls(
+            name=name,
+            rate=float(os.getenv(f"{prefix}_RATE_LIMIT", rate)),
+            burst=int(os.getenv(f"{prefix}_BURST", burst)),
+            max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", max_concurrency)),
+            min_concurrency=int(os.getenv(f"{prefix}_MIN_CONCURRENCY", min_concurrency)),
+            target_latency=float(os.getenv(f"{prefix}_TARGET_LATENCY", target_latency)),
+            initial_concurrency=int(initial_concurrency) if initial_concurrency is not None else None,
+        )
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        start = time.monotonic()
+        async with self.slot_released:
+            await self.slot_released.wait_for(lambda: self.in_flight < int(self.concurrency_limit))
+            self.in_flight += 1
+        try:
+            # Callers waiting for a token are served one at a time, in order of arrival
+            async with self.token_lock:
+                self._refill()
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self._refill()
+                self.tokens -= 1
+        except BaseException:
+            await self.release()
+            raise
+        self.last_wait = time.monotonic() - start
+        self.total_wait += self.last_wait
+        self.max_wait = max(self.max_wait, self.last_wait)
+        self.calls += 1
+
+    async def release(self) -> None:
+        async with self.slot_released:
+            self.in_flight -= 1
+            self.slot_released.notify_all()
+
+    def _increase(self) -> None:
+        # Additive increase: one more slot once a whole window of concurrency_limit calls went well
+        self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+
+    def _decrease(self) -> None:
+        # Multiplicative decrease, at most once per target_latency, as the calls already in flight report the same congestion
+        now = time.monotonic()
+        if now - self.last_decrease_at < self.target_latency:
+            return
+        self.last_decrease_at = now
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * self.backoff)
+
+    def record(self, latency: float, throttled: bool = False) -> None:
+        self.total_latency += latency
+        if throttled:
+            self.throttled_calls += 1
+            self._decrease()
+        elif latency > self.target_latency:
+            self.slow_calls += 1
+            self._decrease()
+        else:
+            self._increase()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Holds a slot for one upstream call and feeds its latency and throttling signals to the concurrency controller."""
+        await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            if is_throttling_error(e):
+                self.record(time.monotonic() - start, throttled=True)
+            raise
+        else:
+            self.record(time.monotonic() - start)
+        finally:
+            await self.release()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "rate": self.rate,
+            "concurrency_limit": int(self.concurrency_limit),
+            "min_concurrency": self.min_concurrency,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "throttled_calls": self.throttled_calls,
+            "slow_calls": self.slow_calls,
+            "mean_latency": self.total_latency / self.calls if self.calls else 0.0,
+            "last_wait": self.last_wait,
+            "mean_wait": self.total_wait / self.calls if self.calls else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+limiters = {
+    # browserHtml renders regularly take several seconds, hence the higher latency target
+    "zyte": UpstreamLimiter.from_env("zyte", rate=8, burst=16, max_concurrency=48, min_concurrency=4, target_latency=15),
+    "france_travail": UpstreamLimiter.from_env("france_travail", rate=3, burst=3, max_concurrency=3, target_latency=3),
+    "mistral": UpstreamLimiter.from_env("mistral", rate=5, burst=5, max_concurrency=4, target_latency=5),
+    "qdrant": UpstreamLimiter.from_env("qdrant", rate=100, burst=100, max_concurrency=8, target_latency=1),
+}
@@ -1,7 +1,13 @@
 from .france_travail.scraper import FranceTravailScraper
 from .indeed.scraper import IndeedScraper
 from .wtj.scraper import WelcomeToTheJungleScraper
+from aiden_recommender.serialization import register_callback_owner
 
 france_travail_scraper = FranceTravailScraper(results_multiplier=2)
 indeed_scraper = IndeedScraper()
 wtj_scraper = WelcomeToTheJungleScraper(results_multiplier=2)
+
+# Callbacks of requests shared through the distributed queue refer to the scrapers by these names
+register_callback_owner("france_travail_scraper", france_travail_scraper)
+register_callback_owner("indeed_scraper", indeed_scraper)
+register_callback_owner("wtj_scraper", wtj_scraper)
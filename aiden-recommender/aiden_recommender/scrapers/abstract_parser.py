@@ -1,20 +1,46 @@
 from abc import ABC
+from functools import cache
 from typing import Iterable
 
+from pydantic import TypeAdapter
+
 from aiden_shared.models import JobOffer
 from aiden_recommender.scrapers.field_extractors import FieldExtractor
 
 
+job_offers_adapter = TypeAdapter(list[JobOffer])
+
+
 class AbstractParser(ABC):
     source: FieldExtractor
+    # Records parsed and validated together by parse_batch, bounds the memory held by one batch
+    batch_size = 64
+
+    @classmethod
+    @cache
+    def extraction_plan(cls) -> list[FieldExtractor]:
+        """The extractors of the parser in the order they are applied, alphabetical like dir(), resolved once per class."""
+        return [extractor for field in dir(cls) if isinstance(extractor := getattr(cls, field), FieldExtractor)]
 
     def transform_to_job_offer(self, data) -> JobOffer:
-        for field in dir(self):
-            extractor = getattr(self, field)
-            if isinstance(extractor, FieldExtractor):
-                data.update(extractor.extract(data))
+        # Each extractor sees the fields written by the previous ones
+        for extractor in self.extraction_plan():
+            data.update(extractor.extract(data))
         return JobOffer(**data)
 
     def parse(self, data) -> Iterable[JobOffer]:
         for job_offer in data:
             yield self.transform_to_job_offer(job_offer)
+
+    def parse_batch(self, data: list[dict]) -> Iterable[JobOffer]:
+        """
+        Same output as parse for a whole result page. Each extractor runs over all the records of a batch before the next one,
+        writing its values straight into the records, and each batch is validated with a single list validation.
+        """
+        plan = self.extraction_plan()
+        for start in range(0, len(data), self.batch_size):
+            records = data[start : start + self.batch_size]
+            for extractor in plan:
+                for record, value in zip(records, extractor.extract_column(records)):
+                    extractor.assign(record, value)
+            yield from job_offers_adapter.validate_python(records)
@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 from base64 import b64decode
 from functools import partial
 from datetime import timedelta
-from typing import Any, Callable, Iterable
+from typing import Any, Callable, Iterable, Optional
 
 from bs4 import BeautifulSoup
 from loguru import logger
@@ -10,8 +10,8 @@ from loguru import logger
 from aiden_shared.models import JobOffer
 from aiden_recommender.models import MistralEmbeddingRequest, QdrantRequest, Request, ScraperItem, ZyteRequest
 from aiden_recommender.scrapers.abstract_parser import AbstractParser
-from aiden_recommender.tools import zyte_session
-from aiden_shared.tools import async_redis_client
+from aiden_recommender.scrapers.pagination import pagination_cursors
+from aiden_recommender.zyte_client import zyte_client
 
 
 def chunk_list(lst, n):
@@ -19,10 +19,11 @@ def chunk_list(lst, n):
 
 
 class AbstractScraper(ABC):
-    zyte_url = "https://api.zyte.com/v1/extract"
     settings = {}
     parser: AbstractParser
     zyte_api_automap = {"httpResponseBody": True}
+    # Scrapers extracting scripts from the raw html get it as a string instead of a BeautifulSoup
+    build_soup = True
 
     def __init__(self, results_multiplier: int = 1, retention_period=timedelta(days=1)):
         self.results_multiplier = results_multiplier
@@ -35,7 +36,7 @@ class AbstractScraper(ABC):
 
     def _extract_zyte_data(self, response: dict) -> BeautifulSoup | str:
         if response.get("browserHtml"):
-            return BeautifulSoup(response["browserHtml"], "html.parser")
+            return BeautifulSoup(response["browserHtml"], "html.parser") if self.build_soup else response["browserHtml"]
         elif response.get("httpResponseBody"):
             return b64decode(response["httpResponseBody"]).decode("utf-8")
         else:
@@ -44,7 +45,7 @@ class AbstractScraper(ABC):
     def parse_response(self, response: dict, parser_func: Callable, meta: dict[str, str] = {}) -> Iterable[JobOffer | Request]:
         for next_item in parser_func(response, meta):
             if isinstance(next_item, ScraperItem):
-                job_offers = list(self.parser.parse(next_item.raw_data))
+                job_offers = list(self.parser.parse_batch(next_item.raw_data))
                 for job_offer in job_offers:
                     yield self._get_embedding_request(job_offer)
                     yield job_offer
@@ -56,55 +57,59 @@ class AbstractScraper(ABC):
         data = self._extract_zyte_data(response)
         yield from self.parse_response(data, parser_func, meta)
 
-    def inline_get_zyte(self, url, additional_zyte_params: dict = {}) -> BeautifulSoup | str:
+    async def inline_get_zyte(self, url, additional_zyte_params: dict = {}) -> BeautifulSoup | str:
         query = {"url": url}
         query.update(self.zyte_api_automap)
         query.update(additional_zyte_params)
-        data = zyte_session.post(self.zyte_url, json=query)
-        try:
-            return self._extract_zyte_data(data.json())
-        except Exception:
-            return BeautifulSoup(data.text, "html.parser")
-
-    def get_zyte_request(self, url: str, callback: Callable, additional_zyte_params: dict = {}, meta: dict[str, Any] = {}) -> ZyteRequest:
+        return self._extract_zyte_data(await zyte_client.get(query))
+
+    def get_zyte_request(
+        self,
+        url: str,
+        callback: Callable,
+        additional_zyte_params: dict = {},
+        meta: dict[str, Any] = {},
+        priority: Optional[int] = None,
+    ) -> ZyteRequest:
         logger.warning("Sending request to Zyte")
         query: dict[str, Any] = {"url": url}
         query.update(self.zyte_api_automap)
         query.update(additional_zyte_params)
         _callback = partial(self.parse_zyte_response, parser_func=callback, meta=meta)
-        return ZyteRequest(query=query, callback=_callback)
+        return ZyteRequest(query=query, callback=_callback, priority=priority)
 
     def _get_qdrant_request(self, embeddings, job_offers) -> Iterable[QdrantRequest]:
         logger.warning("Sending request to Qdrant")
-        yield QdrantRequest(embeddings=embeddings.data, job_offers=job_offers)
+        # Cached offers are not embedded again, so the embeddings are matched to their offers by index
+        yield QdrantRequest(embeddings=embeddings, job_offers=[job_offers[embedding.index] for embedding in embeddings])
 
     def _get_embedding_request(self, job_offer: JobOffer) -> MistralEmbeddingRequest:
         logger.warning("Sending request to Mistral")
         callback = partial(self._get_qdrant_request, job_offers=[job_offer])
         return MistralEmbeddingRequest(input=[job_offer], callback=callback)
 
+    async def prepare(self, search_query: str, location: str) -> None:
+        """Loads what get_start_requests needs for a search from the network, without blocking the event loop."""
+
     @abstractmethod
     def get_start_requests(self, search_query: str, location: str, num_results: int, start_index: int) -> Iterable[Request]:
         return []
 
     async def get_cached_start_requests(self, search_query: str, location: str, num_results: int, start_index: int):
-        offer_seen = await async_redis_client.exists(f"{self.source}-{search_query}-{location}")
-        if offer_seen >= start_index + num_results:
-            logger.info(f"{offer_seen} cache HIT: {search_query}, {location}, {num_results}")
+        """Start requests of the results start_index to start_index + num_results that are beyond the pagination cursor of the search."""
+        end_index = start_index + num_results
+        crawled = await pagination_cursors.get(self.source, search_query, location)
+        if crawled >= end_index:
+            logger.info(f"{crawled} cache HIT: {search_query}, {location}, {num_results}")
             return
-        for request in self.get_start_requests(search_query, location, num_results, offer_seen):
+        start_index = max(start_index, crawled)
+        await self.prepare(search_query, location)
+        for request in self.get_start_requests(search_query, location, end_index - start_index, start_index):
             yield request
 
-    async def set_cache(self, search_query: str, location: str, num_results: int):
-        cache_key = f"{self.source}-{search_query}-{location}"
-        current_value = await async_redis_client.get(cache_key)
-
-        if current_value is None:
-            await async_redis_client.setex(cache_key, self.retention_period, num_results)
-        else:
-            new_value = int(current_value) + num_results
-            await async_redis_client.setex(cache_key, self.retention_period, new_value)
+    async def advance_cursor(self, search_query: str, location: str, start_index: int, end_index: int) -> int:
+        return await pagination_cursors.advance(self.source, search_query, location, start_index, end_index, self.retention_period)
 
     @abstractmethod
-    def get_form(self, job_offer: JobOffer) -> dict[str, Any]:
+    async def get_form(self, job_offer: JobOffer) -> dict[str, Any]:
         pass
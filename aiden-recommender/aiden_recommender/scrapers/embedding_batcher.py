@@ -0,0 +1,103 @@
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Iterable, Optional
+
+from loguru import logger
+from mistralai.models.embeddings import EmbeddingObject
+
+from aiden_shared.models import JobOffer
+from aiden_recommender.models import MistralEmbeddingRequest, Request
+from aiden_recommender.serialization import register_callback_function
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough upper bound of the number of mistral-embed tokens, french text averages a bit more than 3 characters per token
+    return len(text) // 3 + 1
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces the embedding requests emitted by every scraper into batched Mistral calls.
+    A batch is closed when it reaches max_batch_size inputs, max_batch_tokens estimated tokens or max_wait seconds, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        submit: Callable[[Request], Awaitable[None]],
+        release: Callable[[Request], Awaitable[None]],
+        max_batch_size: int = 64,
+        max_batch_tokens: int = 12000,
+        max_wait: float = 0.5,
+    ):
+        self.submit = submit
+        self.release = release
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait
+        self.pending: list[MistralEmbeddingRequest] = []
+        self.pending_inputs = 0
+        self.pending_tokens = 0
+        self.flush_task: Optional[asyncio.Task] = None
+
+    def empty(self) -> bool:
+        return not self.pending
+
+    async def put(self, request: MistralEmbeddingRequest) -> None:
+        tokens = sum(estimate_tokens(item.metadata_repr()) for item in request.input)
+        if self.pending and self.pending_tokens + tokens > self.max_batch_tokens:
+            await self.flush()
+        self.pending.append(request)
+        self.pending_inputs += len(request.input)
+        self.pending_tokens += tokens
+        if self.pending_inputs >= self.max_batch_size or self.pending_tokens >= self.max_batch_tokens:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_wait)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        if not self.pending:
+            return
+        batch = self.pending
+        self.pending = []
+        self.pending_inputs = 0
+        self.pending_tokens = 0
+        logger.info(f"Flushing {len(batch)} embedding requests")
+        request = MistralEmbeddingRequest(
+            input=[item for pending_request in batch for item in pending_request.input],
+            callback=partial(self._dispatch, requests=batch),
+            scrape_ids=set().union(*(pending_request.scrape_ids for pending_request in batch)),
+        )
+        # The batched request is submitted before the coalesced ones are released, so their scrapes can't finish in between
+        await self.submit(request)
+        for pending_request in batch:
+            await self.release(pending_request)
+
+    @staticmethod
+    def _dispatch(embeddings: list[EmbeddingObject], requests: list[MistralEmbeddingRequest]) -> Iterable[JobOffer | Request]:
+        # Split the batched embeddings back per coalesced request and run their own callbacks
+        offset = 0
+        for request in requests:
+            size = len(request.input)
+            request_embeddings = [
+                embedding.model_copy(update={"index": embedding.index - offset})
+                for embedding in embeddings
+                if offset <= embedding.index < offset + size
+            ]
+            offset += size
+            if request_embeddings and request.callback:
+                for next_item in request.callback(request_embeddings):
+                    if isinstance(next_item, Request):
+                        next_item.scrape_ids = set(request.scrape_ids)
+                    yield next_item
+
+
+# The batched requests go through the request queue, their callback is loaded back from it
+register_callback_function(EmbeddingBatcher._dispatch)
@@ -1,9 +1,37 @@
+import re
 from typing import Any, Callable, Optional
 
 import jmespath
+from jmespath.visitor import TreeInterpreter
 from pydantic import BaseModel
 from pydantic_core import ValidationError
 
+_FIELD_PATH = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*")
+
+
+class CompiledQuery:
+    """
+    A jmespath expression parsed once. Plain field paths like "lieuTravail.latitude" are evaluated with dict lookups,
+    other expressions by an interpreter shared by every query instead of one created per search.
+    """
+
+    interpreter = TreeInterpreter()
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.fields = expression.split(".") if _FIELD_PATH.fullmatch(expression) else None
+        self.parsed = jmespath.compile(expression).parsed if self.fields is None else None
+
+    def search(self, data: Any) -> Any:
+        if self.fields is None:
+            return self.interpreter.visit(self.parsed, data)
+        for field in self.fields:
+            # Same as jmespath: looking a field up in anything but an object gives null
+            if not isinstance(data, dict):
+                return None
+            data = data.get(field)
+        return data
+
 
 class FieldExtractor:
     def __init__(
@@ -23,22 +51,54 @@ class FieldExtractor:
         self.model = model
         self.nested_fields = nested_fields
         self.aggregate_func = aggregate_func if aggregate_func else lambda x: x
+        # Expressions are parsed once here, extract only evaluates them
+        self.compiled_query = self.compile(query)
+        # Without query, model or transform the extracted value is the record itself, which always resolves to the default
+        self.is_constant = query is None and model is None and transform_func is None and aggregate_func is None
 
     @staticmethod
-    def select(data: dict, query: str) -> Any:
-        if not query:
+    def compile(query: Optional[str | list[str]]) -> Optional[CompiledQuery | list[Optional[CompiledQuery]]]:
+        if isinstance(query, list):
+            return [CompiledQuery(q) if q else None for q in query]
+        elif isinstance(query, str):
+            return CompiledQuery(query) if query else None
+        elif query is None:
+            return None
+        raise ValueError("Query should be string or list of strings")
+
+    @staticmethod
+    def select(data: dict, query: Optional[CompiledQuery]) -> Any:
+        if query is None:
             return data
-        return jmespath.search(query, data)
+        return query.search(data)
 
     def extract(self, data: dict) -> dict:
-        if isinstance(self.query, list):
-            result = [self.select(data, q) for q in self.query]
-        elif isinstance(self.query, str):
-            result = self.select(data, self.query)
-        elif self.query is None:
-            result = data
+        result = self.extract_value(data)
+        if isinstance(self.field, list):
+            return {field: value for field, value in zip(self.field, result)}
+        return {self.field: result}
+
+    def extract_column(self, records: list[dict]) -> list[Any]:
+        """Extracts the value of this field for every record, in one pass."""
+        if self.is_constant:
+            return [self.default] * len(records)
+        return [self.extract_value(data) for data in records]
+
+    def assign(self, record: dict, value: Any) -> None:
+        """Writes a value returned by extract_value into the record, like record.update(extract(record)) would."""
+        if isinstance(self.field, list):
+            for field, field_value in zip(self.field, value):
+                record[field] = field_value
+        else:
+            record[self.field] = value
+
+    def extract_value(self, data: dict) -> Any:
+        if self.is_constant:
+            return self.default
+        if isinstance(self.compiled_query, list):
+            result = [self.select(data, q) for q in self.compiled_query]
         else:
-            raise ValueError("Query should be string or list of strings")
+            result = self.select(data, self.compiled_query)
 
         if self.model:
             try:
@@ -65,10 +125,6 @@ class FieldExtractor:
         elif result is not None:
             result = self.transform_func(result)
 
-        if result is None or result == "" or result == [] or result == {} or result == data:
+        if result is None or result == "" or result == [] or result == {} or result is data or result == data:
             result = self.default
-
-        if isinstance(self.field, list):
-            return {field: value for field, value in zip(self.field, result)}
-
-        return {self.field: result}
+        return result
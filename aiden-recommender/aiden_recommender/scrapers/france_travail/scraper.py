@@ -1,6 +1,6 @@
 import json
 from datetime import datetime
-from typing import Any, Iterable
+from typing import Any, ClassVar, Iterable, Optional
 from loguru import logger
 from functools import partial
 from copy import deepcopy
@@ -17,6 +17,7 @@ from aiden_shared.models import JobOffer
 
 class JobSearchRequest(Request):
     params: dict[str, str]
+    upstream: ClassVar[Optional[str]] = "france_travail"
 
     def get_coroutine(self, is_cached):
         return async_job_search_client.search(params=self.params)
@@ -37,21 +38,21 @@ class FranceTravailScraper(AbstractScraper):
         yield ScraperItem(raw_data=response["resultats"])
 
     def get_start_requests(self, search_query: str, location: str, num_results: int, start_index: int) -> Iterable[JobSearchRequest]:
-        num_results = min(num_results, 149)
-        end_index = start_index + num_results
-
-        params = {
-            "motsCles": search_query,
-            "lieux": location,
-            "minCreationDate": datetime(2023, 3, 1, 12, 30).strftime(ISO_8601),
-            "maxCreationDate": datetime.today().strftime(ISO_8601),
-            "etatPublication": "Active",
-            "range": f"{start_index}-{end_index}",
-        }
         callback = partial(self.parse_response, parser_func=self._parse_results)
-        logger.warning("Sending request to FranceTravail")
-        yield JobSearchRequest(params=params, callback=callback)
-
-    def get_form(self, job_offer: JobOffer) -> dict[str, Any]:
+        # The API returns at most 150 results per call and its ranges include their last index
+        for range_start in range(start_index, start_index + num_results, 150):
+            range_end = min(range_start + 150, start_index + num_results) - 1
+            params = {
+                "motsCles": search_query,
+                "lieux": location,
+                "minCreationDate": datetime(2023, 3, 1, 12, 30).strftime(ISO_8601),
+                "maxCreationDate": datetime.today().strftime(ISO_8601),
+                "etatPublication": "Active",
+                "range": f"{range_start}-{range_end}",
+            }
+            logger.warning("Sending request to FranceTravail")
+            yield JobSearchRequest(params=params, callback=callback)
+
+    async def get_form(self, job_offer: JobOffer) -> dict[str, Any]:
         # All france travail jobs require CV and motivation letter
         return base_fields
@@ -1,9 +1,10 @@
-from aiden_recommender.models import ScraperItem
+from aiden_recommender.models import Priority, ScraperItem
 import re
 from typing import Any
 from chompjs import parse_js_object
 from aiden_recommender.scrapers.abstract_scraper import AbstractScraper
 from aiden_recommender.scrapers.indeed.parser import IndeedParser
+from aiden_recommender.scrapers.script_extraction import extract_script
 from aiden_recommender.scrapers.utils import extract_form_fields
 from copy import deepcopy
 
@@ -16,6 +17,7 @@ class IndeedScraper(AbstractScraper):
         "browserHtml": True,
     }
     parser = IndeedParser()
+    build_soup = False
     results_per_page = 15
     search_url = base_url + "/jobs?q={search_query}&l={location}&from=searchOnHP&vjk=fa2409e45b11ca41&start={start}"
 
@@ -30,10 +32,8 @@ class IndeedScraper(AbstractScraper):
         url = self.search_url.format(start=start_index, **meta)
         yield self.get_zyte_request(url, meta=meta, callback=self.parse_overview)
 
-    def parse_overview(self, soup, meta):
-        if (script := soup.find("script", {"id": "mosaic-data"})) is not None:
-            script = script.string
-        else:
+    def parse_overview(self, html: str, meta):
+        if (script := extract_script(html, {"id": "mosaic-data"})) is None:
             return []
         results = self._extract_results(script)
         current_results = meta["current_results"] + len(results)
@@ -42,10 +42,13 @@ class IndeedScraper(AbstractScraper):
             url = f"{self.base_url}{result['link']}"
             next_meta = deepcopy(meta)
             next_meta["ov_item"] = result
-            yield self.get_zyte_request(url, meta=next_meta, callback=self.parse_detail)
+            yield self.get_zyte_request(url, meta=next_meta, callback=self.parse_detail, priority=Priority.DEFAULT)
         if len(results) == 15 and current_results < meta["num_results"]:
             yield self.get_zyte_request(
-                url=self.search_url.format(start=meta["start_index"] + current_results, **meta), meta=meta, callback=self.parse_overview
+                url=self.search_url.format(start=meta["start_index"] + current_results, **meta),
+                meta=meta,
+                callback=self.parse_overview,
+                priority=Priority.PAGINATION,
             )
 
     def _extract_results(self, script: str) -> list[dict[str, Any]]:
@@ -63,17 +66,17 @@ class IndeedScraper(AbstractScraper):
         except KeyError:
             return []
 
-    def parse_detail(self, soup, meta):
+    def parse_detail(self, html: str, meta):
         job_offer = meta["ov_item"]
-        if soup is None:
+        if html is None:
             return [ScraperItem(raw_data=[job_offer])]
-        script = soup.find("script", string=lambda text: text and "window._initialData=" in text)
+        script = extract_script(html, containing="window._initialData=")
         if script is None:
             return [ScraperItem(raw_data=[job_offer])]
-        job_data = parse_js_object(str(script)[str(script).index("window._initialData=") :])
+        job_data = parse_js_object(script[script.index("window._initialData=") :])
         job_offer = {**job_offer, **job_data}
         return [ScraperItem(raw_data=[job_offer])]
 
-    def get_form(self, job_offer: JobOffer) -> dict[str, Any]:
+    async def get_form(self, job_offer: JobOffer) -> dict[str, Any]:
         url = f"https://fr.indeed.com/applystart?jk={job_offer.reference}"
-        return extract_form_fields(url)
+        return await extract_form_fields(url)
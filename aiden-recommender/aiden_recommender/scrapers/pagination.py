@@ -0,0 +1,40 @@
+from datetime import timedelta
+from functools import cached_property
+
+from aiden_shared.tools import async_redis_client
+from aiden_recommender.canonical import location_key
+
+
+class PaginationCursors:
+    """
+    High-water mark of the crawls of each source, query and location: the number of top results already crawled and indexed.
+    A new crawl only requests the results beyond the cursor, the ones below it are served from the index.
+    Cursors only move forward and only over contiguous windows, so that a skipped range is never reported as crawled.
+    """
+
+    @cached_property
+    def advance_script(self):
+        # Moves the cursor to ARGV[2] if the crawled window starting at ARGV[1] is contiguous with it, returns the cursor.
+        # Registered on first use, the redis client is not created at import
+        return async_redis_client.register_script(
+            "local cursor = tonumber(redis.call('GET', KEYS[1]) or '0') "
+            "if cursor >= tonumber(ARGV[1]) and tonumber(ARGV[2]) > cursor then "
+            "redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3]) return tonumber(ARGV[2]) end "
+            "return cursor"
+        )
+
+    @staticmethod
+    def _key(source: str, search_query: str, location: str) -> str:
+        return f"crawl-cursor-{source}-{search_query}-{location_key(location)}"
+
+    async def get(self, source: str, search_query: str, location: str) -> int:
+        cursor = await async_redis_client.get(self._key(source, search_query, location))
+        return int(cursor) if cursor is not None else 0
+
+    async def advance(self, source: str, search_query: str, location: str, start_index: int, end_index: int, ttl: timedelta) -> int:
+        """Records that results start_index to end_index have been crawled and returns the new cursor."""
+        keys = [self._key(source, search_query, location)]
+        return int(await self.advance_script(keys=keys, args=[start_index, end_index, int(ttl.total_seconds())]))
+
+
+pagination_cursors = PaginationCursors()
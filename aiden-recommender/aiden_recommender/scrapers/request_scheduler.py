@@ -0,0 +1,196 @@
+import asyncio
+import os
+import socket
+import time
+from collections import OrderedDict, deque
+from functools import cached_property
+from typing import Optional
+
+from loguru import logger
+from redis.exceptions import ResponseError
+
+from aiden_shared.tools import async_redis_client
+from aiden_recommender.models import Priority, Request
+from aiden_recommender.serialization import dumps, loads
+
+
+class RequestScheduler:
+    """
+    Queue of the requests waiting for a worker.
+    Requests with the lowest priority value are served first, requests of equal priority are served round robin across scrapes.
+    """
+
+    def __init__(self):
+        # priority -> scrape lane -> requests, only non empty levels and lanes are kept
+        self.levels: dict[int, OrderedDict[frozenset, deque[Request]]] = {}
+        self.items = asyncio.Semaphore(0)
+        self.size = 0
+
+    def empty(self) -> bool:
+        return self.size == 0
+
+    def qsize(self) -> int:
+        return self.size
+
+    async def put(self, request: Request) -> None:
+        priority = request.priority if request.priority is not None else Priority.DEFAULT
+        lanes = self.levels.setdefault(priority, OrderedDict())
+        lanes.setdefault(frozenset(request.scrape_ids), deque()).append(request)
+        self.size += 1
+        self.items.release()
+
+    async def get(self) -> Request:
+        await self.items.acquire()
+        priority = min(self.levels)
+        lanes = self.levels[priority]
+        lane, requests = next(iter(lanes.items()))
+        request = requests.popleft()
+        if requests:
+            # The lane goes back to the end of the line, so that the other scrapes are served before it again
+            lanes.move_to_end(lane)
+        else:
+            del lanes[lane]
+        if not lanes:
+            del self.levels[priority]
+        self.size -= 1
+        return request
+
+    async def ack(self, request: Request) -> None:
+        pass
+
+    def stats(self) -> dict[str, float]:
+        stats = {"queued_requests": self.size}
+        for priority, lanes in sorted(self.levels.items()):
+            stats[f"queued_requests_priority_{priority}"] = sum(len(requests) for requests in lanes.values())
+        return stats
+
+
+class RedisStreamScheduler:
+    """
+    Request queue shared by every recommender process through Redis Streams, one stream per priority.
+    Processes read the streams as consumers of one group, so each request is handled by a single worker, and acknowledge it once handled.
+    Requests left unacknowledged for claim_after seconds, e.g. by a process that died, are claimed again by the live consumers.
+    A live consumer refreshes the requests it holds every claim_after / 3 seconds, however long they take to handle
+    (a Zyte request can retry for minutes), so that they are never claimed while in flight.
+    Requests of equal priority are served in order of arrival.
+    """
+
+    group = "recommender"
+
+    def __init__(self, stream_prefix: str = "request-queue", block: int = 1000, claim_after: float = 60.0):
+        self.streams = {priority: f"{stream_prefix}-{priority.value}" for priority in Priority}
+        self.block = block
+        self.claim_after = claim_after
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.groups_created = False
+        self.last_claim_at = 0.0
+        # Entries read by this consumer but not yet handed to a worker, with their stream and entry id
+        self.buffer: list[tuple[int, str, bytes, Request]] = []
+        self.entry_ids: dict[int, tuple[str, bytes]] = {}
+        self.acknowledged = 0
+        self.claimed = 0
+        self.heartbeat_task: Optional[asyncio.Task] = None
+
+    @cached_property
+    def refresh_script(self):
+        # Resets the idle time of the entries ARGV[3:] still owned by consumer ARGV[2], an entry claimed by another consumer stays there.
+        # Registered on first use, the redis client is not created at import
+        return async_redis_client.register_script(
+            "for i = 3, #ARGV do "
+            "if #redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[i], ARGV[i], 1, ARGV[2]) > 0 then "
+            "redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[2], 0, ARGV[i], 'JUSTID') end "
+            "end return true"
+        )
+
+    def _stream(self, request: Request) -> str:
+        priority = request.priority if request.priority is not None else Priority.DEFAULT
+        return self.streams[Priority(min(max(priority, min(Priority)), max(Priority)))]
+
+    async def _create_groups(self) -> None:
+        if self.groups_created:
+            return
+        for stream in self.streams.values():
+            try:
+                await async_redis_client.xgroup_create(stream, self.group, id="0", mkstream=True)
+            except ResponseError as e:
+                # Another process created it first
+                if "BUSYGROUP" not in str(e):
+                    raise
+        self.groups_created = True
+
+    def empty(self) -> bool:
+        return not self.buffer
+
+    def qsize(self) -> int:
+        return len(self.buffer)
+
+    async def put(self, request: Request) -> None:
+        await async_redis_client.xadd(self._stream(request), {"request": dumps(request)})
+
+    def _buffer(self, stream: str, entries: list) -> None:
+        priority = next(priority for priority, name in self.streams.items() if name == stream)
+        for entry_id, fields in entries:
+            if fields:
+                self.buffer.append((priority, stream, entry_id, loads(fields[b"request"])))
+        self.buffer.sort(key=lambda entry: entry[0])
+
+    async def _claim(self) -> None:
+        for stream in self.streams.values():
+            _, entries, *_ = await async_redis_client.xautoclaim(
+                stream, self.group, self.consumer, min_idle_time=int(self.claim_after * 1000), count=10
+            )
+            self.claimed += len(entries)
+            self._buffer(stream, entries)
+
+    async def _refresh(self) -> None:
+        # Both the entries buffered and the ones handed to a worker are pending on this consumer
+        held: dict[str, list[bytes]] = {}
+        for _, stream, entry_id, _ in self.buffer:
+            held.setdefault(stream, []).append(entry_id)
+        for stream, entry_id in self.entry_ids.values():
+            held.setdefault(stream, []).append(entry_id)
+        for stream, entry_ids in held.items():
+            await self.refresh_script(keys=[stream], args=[self.group, self.consumer, *entry_ids])
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.claim_after / 3)
+            try:
+                await self._refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh the requests in flight: {e}")
+
+    async def get(self) -> Request:
+        await self._create_groups()
+        if self.heartbeat_task is None:
+            self.heartbeat_task = asyncio.create_task(self._heartbeat())
+        while not self.buffer:
+            if time.monotonic() - self.last_claim_at > self.claim_after:
+                self.last_claim_at = time.monotonic()
+                await self._claim()
+                continue
+            # Streams are read in priority order, the first one with new entries wins
+            for stream in self.streams.values():
+                if response := await async_redis_client.xreadgroup(self.group, self.consumer, {stream: ">"}, count=1):
+                    self._buffer(stream, response[0][1])
+                    break
+            else:
+                # Nothing queued anywhere, block until any stream receives an entry
+                response = await async_redis_client.xreadgroup(
+                    self.group, self.consumer, {stream: ">" for stream in self.streams.values()}, count=1, block=self.block
+                )
+                for stream, entries in response or []:
+                    self._buffer(stream.decode(), entries)
+        _, stream, entry_id, request = self.buffer.pop(0)
+        self.entry_ids[id(request)] = (stream, entry_id)
+        return request
+
+    async def ack(self, request: Request) -> None:
+        if (entry := self.entry_ids.pop(id(request), None)) is not None:
+            stream, entry_id = entry
+            await async_redis_client.xack(stream, self.group, entry_id)
+            await async_redis_client.xdel(stream, entry_id)
+            self.acknowledged += 1
+
+    def stats(self) -> dict[str, float]:
+        return {"buffered_requests": len(self.buffer), "acknowledged_requests": self.acknowledged, "claimed_requests": self.claimed}
@@ -0,0 +1,94 @@
+import asyncio
+import json
+from typing import Optional
+from uuid import UUID
+
+from aiden_shared.models import JobOffer
+from aiden_shared.tools import async_redis_client
+from aiden_recommender.models import QdrantRequest
+
+
+class ResultStream:
+    """
+    Fans the offers ingested by QdrantRequests out to the callers streaming the results of their scrapes.
+    Each subscriber receives (job_offer, vector) pairs, then None once its scrape is finished.
+    """
+
+    def __init__(self):
+        self.subscribers: dict[UUID, list[asyncio.Queue]] = {}
+
+    async def subscribe(self, scrape_id: UUID) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self.subscribers.setdefault(scrape_id, []).append(queue)
+        return queue
+
+    async def unsubscribe(self, scrape_id: UUID, queue: asyncio.Queue) -> None:
+        queues = self.subscribers.get(scrape_id, [])
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self.subscribers.pop(scrape_id, None)
+
+    async def publish(self, request: QdrantRequest) -> None:
+        for scrape_id in request.scrape_ids:
+            for queue in self.subscribers.get(scrape_id, []):
+                for job_offer, embedding in zip(request.job_offers, request.embeddings):
+                    queue.put_nowait((job_offer, embedding.embedding))
+
+    async def close(self, scrape_id: UUID) -> None:
+        for queue in self.subscribers.get(scrape_id, []):
+            queue.put_nowait(None)
+
+
+class RedisResultStream(ResultStream):
+    """
+    Result stream going through Redis pub/sub, for offers ingested by other processes through the distributed queue.
+    Each subscriber listens to the channel of its scrape and feeds its local queue.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.listeners: dict[int, asyncio.Task] = {}
+
+    @staticmethod
+    def _channel(scrape_id: UUID) -> str:
+        return f"scrape-results-{scrape_id}"
+
+    async def subscribe(self, scrape_id: UUID) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        pubsub = async_redis_client.pubsub()
+        # Subscribed before returning, so that no offer published in the meantime is missed
+        await pubsub.subscribe(self._channel(scrape_id))
+        self.listeners[id(queue)] = asyncio.create_task(self._listen(pubsub, queue))
+        return queue
+
+    @staticmethod
+    async def _listen(pubsub, queue: asyncio.Queue) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                data: Optional[dict] = json.loads(message["data"])
+                if data is None:
+                    queue.put_nowait(None)
+                    return
+                queue.put_nowait((JobOffer(**data["job_offer"]), data["vector"]))
+        finally:
+            await pubsub.aclose()
+
+    async def unsubscribe(self, scrape_id: UUID, queue: asyncio.Queue) -> None:
+        if (listener := self.listeners.pop(id(queue), None)) is not None:
+            listener.cancel()
+
+    async def publish(self, request: QdrantRequest) -> None:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for scrape_id in request.scrape_ids:
+                for job_offer, embedding in zip(request.job_offers, request.embeddings):
+                    pipe.publish(
+                        self._channel(scrape_id),
+                        json.dumps({"job_offer": job_offer.model_dump(mode="json"), "vector": embedding.embedding}),
+                    )
+            await pipe.execute()
+
+    async def close(self, scrape_id: UUID) -> None:
+        await async_redis_client.publish(self._channel(scrape_id), json.dumps(None))
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Iterable, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from aiden_shared.models import ScrapeStatus
+from aiden_shared.tools import async_redis_client
+
+
+class ScrapeProgress(BaseModel):
+    status: ScrapeStatus
+    requests_pending: int = 0
+    requests_done: int = 0
+    offers_ingested: dict[str, int] = {}
+    elapsed: float = 0.0
+
+
+class ScrapeProgressStore:
+    """
+    Keeps the status and progress of every scrape in a Redis hash, so that any recommender process can report it.
+    Counters are accumulated in memory and written with one pipelined round trip every flush_interval seconds,
+    so the counts of requests handled by other processes may land up to flush_interval after the scrape is reported finished.
+    The hashes expire ttl seconds after their last update.
+    """
+
+    def __init__(self, ttl: int = int(os.getenv("SCRAPE_STATUS_TTL", 24 * 3600)), flush_interval: float = 0.5):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.counters: dict[UUID, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.flush_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(scrape_id: UUID) -> str:
+        return f"scrape-status-{scrape_id}"
+
+    def increment(self, scrape_ids: Iterable[UUID], field: str, amount: int = 1) -> None:
+        for scrape_id in scrape_ids:
+            self.counters[scrape_id][field] += amount
+        if self.flush_task is None:
+            self.flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        if not self.counters:
+            return
+        counters = self.counters
+        self.counters = defaultdict(lambda: defaultdict(int))
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for scrape_id, fields in counters.items():
+                for field, amount in fields.items():
+                    pipe.hincrby(self._key(scrape_id), field, amount)
+                pipe.expire(self._key(scrape_id), self.ttl)
+            await pipe.execute()
+
+    async def start(self, scrape_id: UUID) -> None:
+        # Starting an already started scrape keeps its original start time
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(self._key(scrape_id), "status", ScrapeStatus.IN_PROGRESS.value)
+            pipe.hsetnx(self._key(scrape_id), "started_at", time.time())
+            pipe.expire(self._key(scrape_id), self.ttl)
+            await pipe.execute()
+
+    async def finish(self, scrape_id: UUID) -> None:
+        await self.flush()
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(self._key(scrape_id), mapping={"status": ScrapeStatus.FINISHED.value, "finished_at": time.time()})
+            pipe.expire(self._key(scrape_id), self.ttl)
+            await pipe.execute()
+
+    async def get(self, scrape_id: UUID) -> ScrapeProgress:
+        fields = {field.decode(): value.decode() for field, value in (await async_redis_client.hgetall(self._key(scrape_id))).items()}
+        if "status" not in fields:
+            return ScrapeProgress(status=ScrapeStatus.NOT_FOUND)
+        started_at = float(fields["started_at"])
+        finished_at = float(fields.get("finished_at", time.time()))
+        return ScrapeProgress(
+            status=ScrapeStatus(fields["status"]),
+            requests_pending=int(fields.get("requests_pending", 0)),
+            requests_done=int(fields.get("requests_done", 0)),
+            offers_ingested={
+                field.removeprefix("offers_ingested:"): int(value)
+                for field, value in fields.items()
+                if field.startswith("offers_ingested:")
+            },
+            elapsed=finished_at - started_at,
+        )
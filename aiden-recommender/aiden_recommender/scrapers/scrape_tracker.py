@@ -0,0 +1,138 @@
+import asyncio
+from typing import Iterable
+from uuid import UUID
+
+from loguru import logger
+
+from aiden_shared.tools import async_redis_client
+from aiden_recommender.models import Request
+from aiden_recommender.scrapers.scrape_progress import ScrapeProgressStore
+
+
+class ScrapeTracker:
+    """
+    Counts the outstanding requests of each scrape, so that concurrent scrapes finish independently of each other.
+    A scrape is finished when every request of its request tree has been handled, it is failed if any of them raised.
+    Request counts are also reported to the progress store, which other processes read.
+    """
+
+    def __init__(self, progress: ScrapeProgressStore):
+        self.progress = progress
+        self.outstanding: dict[UUID, int] = {}
+        self.finished: dict[UUID, asyncio.Event] = {}
+        self.failures: set[UUID] = set()
+
+    async def open(self, scrape_id: UUID) -> None:
+        # The scrape holds one reference while it enqueues its start requests, so that it can't finish in between
+        self.outstanding[scrape_id] = 1
+        self.finished[scrape_id] = asyncio.Event()
+
+    async def _increment(self, scrape_ids: Iterable[UUID], amount: int) -> None:
+        for scrape_id in scrape_ids:
+            if scrape_id not in self.outstanding:
+                continue
+            self.outstanding[scrape_id] += amount
+            if self.outstanding[scrape_id] <= 0:
+                self.finished[scrape_id].set()
+
+    async def release(self, scrape_id: UUID) -> None:
+        await self._increment([scrape_id], -1)
+
+    async def add(self, request: Request) -> None:
+        self.progress.increment(request.scrape_ids, "requests_pending")
+        await self._increment(request.scrape_ids, 1)
+
+    async def transfer(self, request: Request, leader: Request) -> None:
+        """Makes the scrapes waiting for request wait for leader instead, along with its follow ups."""
+        joined = request.scrape_ids - leader.scrape_ids
+        self.progress.increment(joined, "requests_pending")
+        leader.scrape_ids |= joined
+        await self._increment(joined, 1)
+
+    async def done(self, request: Request) -> None:
+        self.progress.increment(request.scrape_ids, "requests_pending", -1)
+        self.progress.increment(request.scrape_ids, "requests_done")
+        await self._increment(request.scrape_ids, -1)
+
+    async def fail(self, request: Request) -> None:
+        """Records that request raised, the scrapes waiting for it are incomplete even once it is done."""
+        self.failures.update(scrape_id for scrape_id in request.scrape_ids if scrape_id in self.outstanding)
+
+    async def failed(self, scrape_id: UUID) -> bool:
+        return scrape_id in self.failures
+
+    async def wait(self, scrape_id: UUID, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.finished[scrape_id].wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def close(self, scrape_id: UUID) -> None:
+        # Requests still in flight after a timeout are simply not tracked anymore
+        self.outstanding.pop(scrape_id, None)
+        self.finished.pop(scrape_id, None)
+        self.failures.discard(scrape_id)
+
+
+class RedisScrapeTracker(ScrapeTracker):
+    """
+    Scrape tracker whose counters live in Redis, for requests handled by other processes through the distributed queue.
+    Counters of closed scrapes are not recreated by the requests still in flight.
+    A counter that expired or was evicted before the scrape was closed lost track of its requests: the scrape never
+    counts as finished nor as complete, so that its windows are not reported as crawled.
+    """
+
+    def __init__(self, progress: ScrapeProgressStore, ttl: int = 3600, poll_interval: float = 0.1):
+        super().__init__(progress)
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        # Increments the counter only while the scrape is open
+        self.increment_script = async_redis_client.register_script(
+            "if redis.call('EXISTS', KEYS[1]) == 1 then return redis.call('INCRBY', KEYS[1], ARGV[1]) end return false"
+        )
+        # Flags the scrape as failed only while it is open
+        self.fail_script = async_redis_client.register_script(
+            "if redis.call('EXISTS', KEYS[1]) == 1 then return redis.call('SET', KEYS[2], 1, 'EX', ARGV[1]) end return false"
+        )
+
+    @staticmethod
+    def _key(scrape_id: UUID) -> str:
+        return f"scrape-outstanding-{scrape_id}"
+
+    @staticmethod
+    def _failed_key(scrape_id: UUID) -> str:
+        return f"scrape-failed-{scrape_id}"
+
+    async def open(self, scrape_id: UUID) -> None:
+        await async_redis_client.setex(self._key(scrape_id), self.ttl, 1)
+
+    async def _increment(self, scrape_ids: Iterable[UUID], amount: int) -> None:
+        for scrape_id in scrape_ids:
+            await self.increment_script(keys=[self._key(scrape_id)], args=[amount])
+
+    async def fail(self, request: Request) -> None:
+        for scrape_id in request.scrape_ids:
+            await self.fail_script(keys=[self._key(scrape_id), self._failed_key(scrape_id)], args=[self.ttl])
+
+    async def failed(self, scrape_id: UUID) -> bool:
+        if await async_redis_client.exists(self._failed_key(scrape_id)):
+            return True
+        # The failure flag may have been lost along with the counter
+        return not await async_redis_client.exists(self._key(scrape_id))
+
+    async def wait(self, scrape_id: UUID, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            if (outstanding := await async_redis_client.get(self._key(scrape_id))) is None:
+                logger.warning(f"Scrape {scrape_id} lost its request counter, it is not finished")
+                return False
+            if int(outstanding) <= 0:
+                return True
+            if loop.time() >= deadline:
+                return False
+            await asyncio.sleep(self.poll_interval)
+
+    async def close(self, scrape_id: UUID) -> None:
+        await async_redis_client.delete(self._key(scrape_id), self._failed_key(scrape_id))
@@ -1,25 +1,35 @@
 import asyncio
+import os
 import sys
-from datetime import timedelta
-from uuid import UUID
+from typing import AsyncIterator, Iterable, Optional
+from uuid import UUID, uuid4
 
 from loguru import logger
-from mistralai.models.embeddings import EmbeddingObject
 
 from aiden_shared.constants import JOB_COLLECTION
-from aiden_shared.models import JobOffer, ScrapeStatus
-from aiden_recommender.models import Request
+from aiden_shared.models import JobOffer, RankedJobOffer
+from aiden_recommender.canonical import canonical_search
+from aiden_recommender.models import MistralEmbeddingRequest, Priority, QdrantRequest, Request
+from aiden_recommender.query_cache import cosine_similarity, semantic_query_cache
+from aiden_recommender.rate_limiter import limiters
 from aiden_recommender.scrapers.abstract_scraper import AbstractScraper
+from aiden_recommender.scrapers.embedding_batcher import EmbeddingBatcher
+from aiden_recommender.scrapers.request_scheduler import RedisStreamScheduler, RequestScheduler
+from aiden_recommender.scrapers.result_stream import RedisResultStream, ResultStream
+from aiden_recommender.scrapers.scrape_progress import ScrapeProgress, ScrapeProgressStore
+from aiden_recommender.scrapers.scrape_tracker import RedisScrapeTracker, ScrapeTracker
+from aiden_recommender.scrapers.singleflight import SingleFlight
 from aiden_recommender.scrapers import france_travail_scraper, indeed_scraper, wtj_scraper
-from aiden_recommender.scrapers.utils import cache
-from aiden_shared.tools import mistral_client, qdrant_client
+from aiden_shared.embeddings import embedding_store
+from aiden_shared.tools import async_qdrant_client
+from aiden_recommender.user_vectors import user_vector_cache
 
 logger.remove()
 logger.add(sys.stderr, level="INFO")
 
 
 class ScraperAggregator:
-    def __init__(self, max_workers=64):
+    def __init__(self, max_workers=64, queue_backend: str = os.getenv("REQUEST_QUEUE_BACKEND", "memory")):
         self.scrapers: list[AbstractScraper] = [
             france_travail_scraper,
             wtj_scraper,
@@ -27,107 +37,236 @@ class ScraperAggregator:
         ]
         self.workers = max_workers
         self.timeout = 15
-        self.request_queue = asyncio.Queue()
-        self.results_queue = asyncio.Queue()
+        # Seconds an ingested offer is held back, so that the offers ingested along with it are pushed best first
+        self.stream_window = float(os.getenv("STREAM_REORDER_WINDOW", 0.05))
         self.active_workers = asyncio.Semaphore(self.workers)
-        self.condition = asyncio.Condition()
-        self.scrape_statuses = {}
+        self.progress = ScrapeProgressStore()
+        self.request_queue: RequestScheduler | RedisStreamScheduler
+        if queue_backend == "redis":
+            # Requests, scrape counters and results go through Redis, so that any number of recommender processes share the crawl
+            self.request_queue = RedisStreamScheduler()
+            self.tracker = RedisScrapeTracker(self.progress)
+            self.result_stream = RedisResultStream()
+        else:
+            self.request_queue = RequestScheduler()
+            self.tracker = ScrapeTracker(self.progress)
+            self.result_stream = ResultStream()
+        self.single_flight = SingleFlight()
+        # Scrapes run in the background of streams, the loop only keeps weak references to tasks
+        self.scrape_tasks: set[asyncio.Task] = set()
+        self.embedding_batcher = EmbeddingBatcher(submit=self.submit, release=self.tracker.done)
 
-    @cache(retention_period=timedelta(hours=12), model=EmbeddingObject, source="search_queries")
-    def _get_search_query_vector(self, search_query: str) -> list[EmbeddingObject]:
-        return mistral_client.embeddings(model="mistral-embed", input=[search_query]).data
+    async def submit(self, request: Request) -> None:
+        await self.tracker.add(request)
+        await self.request_queue.put(request)
 
-    async def handle_request(
-        self,
-        request: Request,
-        request_queue: asyncio.Queue,
-        results_queue: asyncio.Queue,
-        active_workers: asyncio.Semaphore,
-        condition: asyncio.Condition,
-    ):
+    async def handle_request(self, request: Request, active_workers: asyncio.Semaphore):
+        if (leader := self.single_flight.join(request)) is not None:
+            # An identical request is already being sent, its result and follow ups will also count for the scrapes of this one
+            await self.tracker.transfer(request, leader)
+            await self.tracker.done(request)
+            return
         async with active_workers:
-            async for item in request.send():
-                if isinstance(item, Request):
-                    await request_queue.put(item)
-                elif isinstance(item, JobOffer):
-                    logger.warning(f"Job offer: {item.name} - {item.source}")
-                    await results_queue.put(item)
-
-        async with condition:
-            if request_queue.empty() and active_workers._value == self.workers:
-                condition.notify_all()
-
-    async def worker(self, queue: asyncio.Queue, results: asyncio.Queue, active_workers: asyncio.Semaphore, condition: asyncio.Condition):
+            try:
+                async for item in request.send():
+                    if isinstance(item, Request):
+                        if not item.scrape_ids:
+                            item.scrape_ids = set(request.scrape_ids)
+                        if item.priority is None:
+                            item.priority = request.priority
+                        if isinstance(item, MistralEmbeddingRequest):
+                            await self.tracker.add(item)
+                            await self.embedding_batcher.put(item)
+                        else:
+                            await self.submit(item)
+                    elif isinstance(item, JobOffer):
+                        logger.warning(f"Job offer: {item.name} - {item.source}")
+                if isinstance(request, QdrantRequest):
+                    await self.result_stream.publish(request)
+                    for job_offer in request.job_offers:
+                        self.progress.increment(request.scrape_ids, f"offers_ingested:{job_offer.source}")
+            except Exception as e:
+                logger.exception(f"Failed to handle {type(request).__name__}: {e}")
+                await self.tracker.fail(request)
+            finally:
+                self.single_flight.finish(request)
+                await self.tracker.done(request)
+
+    async def worker(self, queue: RequestScheduler | RedisStreamScheduler, active_workers: asyncio.Semaphore):
         while True:
-            request = await queue.get()
             try:
-                await self.handle_request(request, queue, results, active_workers, condition)
+                request = await queue.get()
+            except Exception as e:
+                logger.exception(f"Failed to get the next request: {e}")
+                await asyncio.sleep(1)
+                continue
+            try:
+                await self.handle_request(request, active_workers)
             finally:
-                queue.task_done()
+                # Acknowledged once its follow ups are queued, a request lost with its process is handled again elsewhere
+                await queue.ack(request)
 
     async def start_workers(self):
         logger.warning(f"Starting {self.workers} workers")
         for _ in range(self.workers):
-            asyncio.create_task(self.worker(self.request_queue, self.results_queue, self.active_workers, self.condition))
-
-    @staticmethod
-    def _get_user_vector(profile_embedding_id: UUID) -> list[float]:
-        user_profile = qdrant_client.rest.points_api.get_point(collection_name="user_profile", id=str(profile_embedding_id)).result
-        if not user_profile:
-            raise RuntimeError("User not present found in vector DB")
-        if (user_vector := user_profile.vector) is None:
-            raise RuntimeError("User has no vector embedding.")
-        return user_vector
+            asyncio.create_task(self.worker(self.request_queue, self.active_workers))
 
-    async def search_jobs(self, search_query: str, location: str, profile_embedding_id: UUID, num_results: int = 15) -> list[JobOffer]:
-        user_vector = self._get_user_vector(profile_embedding_id)
-        logger.warning(f"Searching for {num_results} jobs with query {search_query} in {location}")
+    async def _crawl(
+        self, scrape_id: UUID, search_query: str, location: str, num_results: int, start_index: int, priority: Optional[int] = None
+    ) -> None:
+        """Enqueues the start requests of every scraper and waits until the whole request tree of this scrape has been handled."""
+        if priority is None:
+            # The first page of a search is what the user is waiting for, deeper pages can wait behind it
+            priority = Priority.FIRST_PAGE if start_index == 0 else Priority.PAGINATION
+        await self.progress.start(scrape_id)
+        await self.tracker.open(scrape_id)
+        # A near duplicate of a query freshly crawled in the same place continues its crawl rather than starting its own
+        search_query = await semantic_query_cache.resolve(search_query, location)
+        # Result window of each scraper that had something left to crawl, pages of a search map to consecutive windows
+        windows: list[tuple[AbstractScraper, int, int]] = []
         for scraper in self.scrapers:
-            async for request in scraper.get_cached_start_requests(search_query, location, num_results * scraper.results_multiplier):
-                await self.request_queue.put(request)
+            window = (start_index * scraper.results_multiplier, (start_index + num_results) * scraper.results_multiplier)
+            async for request in scraper.get_cached_start_requests(search_query, location, window[1] - window[0], window[0]):
+                request.scrape_ids = {scrape_id}
+                if request.priority is None:
+                    request.priority = priority
+                await self.submit(request)
+                if not windows or windows[-1][0] is not scraper:
+                    windows.append((scraper, *window))
+        await self.tracker.release(scrape_id)
 
         logger.warning("Waiting for results")
-        try:
-            async with self.condition:
-                await asyncio.wait_for(
-                    self.condition.wait_for(lambda: self.request_queue.empty() and self.active_workers._value == self.workers),
-                    timeout=self.timeout,
-                )
-        except asyncio.TimeoutError:
+        complete = False
+        if not await self.tracker.wait(scrape_id, timeout=self.timeout):
             logger.warning("Timeout reached")
+        elif await self.tracker.failed(scrape_id):
+            logger.warning("Some requests failed, the crawled windows will be requested again")
+        else:
+            # Only a complete crawl without errors moves the cursors, the windows of any other are requested again by the next page
+            for scraper, window_start, window_end in windows:
+                await scraper.advance_cursor(search_query, location, window_start, window_end)
+            complete = True
+        await self.tracker.close(scrape_id)
+        await self.progress.finish(scrape_id)
+        # Near duplicates are only served from a crawl that completed and indexed offers, never from an empty one
+        if complete and windows and any((await self.progress.get(scrape_id)).offers_ingested.values()):
+            await semantic_query_cache.add(search_query, location)
+
+    async def _get_search_vector(self, search_query: str, location: str, profile_embedding_id: Optional[UUID]) -> list[float]:
+        if profile_embedding_id is None:
+            return (await embedding_store.aembed([search_query + " " + location], slot=limiters["mistral"].slot))[0]
+        # Both vectors are usually cached, in Redis and in memory, so they are fetched concurrently
+        embeddings, user_vector = await asyncio.gather(
+            embedding_store.aembed([search_query + " " + location], slot=limiters["mistral"].slot),
+            user_vector_cache.get(profile_embedding_id),
+        )
+        search_query_vector = embeddings[0]
+        return [a + (b * 0.5) for a, b in zip(search_query_vector, user_vector)]  # type: ignore
+
+    async def search_jobs(self, search_query: str, location: str, profile_embedding_id: UUID, num_results: int = 15) -> list[JobOffer]:
+        search_query, location = canonical_search(search_query, location)
+        search_vector = await self._get_search_vector(search_query, location, profile_embedding_id)
+        logger.warning(f"Searching for {num_results} jobs with query {search_query} in {location}")
+        await self._crawl(uuid4(), search_query, location, num_results, start_index=0)
 
-        search_query_vector = self._get_search_query_vector(search_query + " " + location)[0].embedding
-        search_vector = [a + (b * 0.5) for a, b in zip(search_query_vector, user_vector)]  # type: ignore
-        search_result = qdrant_client.search(
+        search_result = await async_qdrant_client.search(
             collection_name=JOB_COLLECTION, query_vector=search_vector, with_vectors=False, with_payload=True, limit=num_results
         )
         logger.warning(f"Found {len(search_result)} results")
         return [JobOffer(**result.payload) for result in search_result]  # type: ignore
 
-    async def scrape(self, scrape_id: UUID, search_query: str, location: str, num_results: int = 15, start_index: int = 0) -> None:
-        self.scrape_statuses[scrape_id] = ScrapeStatus.IN_PROGRESS
-        for scraper in self.scrapers:
-            async for request in scraper.get_cached_start_requests(
-                search_query, location, num_results * scraper.results_multiplier, start_index
-            ):
-                await self.request_queue.put(request)
+    async def scrape(
+        self,
+        scrape_id: UUID,
+        search_query: str,
+        location: str,
+        num_results: int = 15,
+        start_index: int = 0,
+        priority: Optional[int] = None,
+    ) -> None:
+        search_query, location = canonical_search(search_query, location)
+        try:
+            await self._crawl(scrape_id, search_query, location, num_results, start_index, priority)
+        finally:
+            await self.result_stream.close(scrape_id)
 
-        logger.warning("Waiting for results")
+    async def stream_jobs(
+        self,
+        search_query: str,
+        location: str,
+        profile_embedding_id: Optional[UUID],
+        num_results: int = 15,
+        start_index: int = 0,
+        exclude: Iterable[str] = (),
+        priority: Optional[int] = None,
+    ) -> AsyncIterator[RankedJobOffer]:
+        """
+        Scrapes the search and yields its best matches as they are ingested, without waiting for the end of the scrape.
+        The candidates are the offers already indexed plus the ones ingested by the scrape, the best one is pushed as soon as there is
+        one. An ingested offer is held back for at most stream_window seconds, the offers ingested within that window are ranked with it.
+        """
+        scrape_id = uuid4()
+        search_query, location = canonical_search(search_query, location)
+        search_vector = await self._get_search_vector(search_query, location, profile_embedding_id)
+        sent = set(exclude)
+        candidates: dict[str, RankedJobOffer] = {}
+        results = await self.result_stream.subscribe(scrape_id)
+        task = asyncio.create_task(self.scrape(scrape_id, search_query, location, num_results, start_index, priority))
+        self.scrape_tasks.add(task)
+        task.add_done_callback(self._scrape_done)
         try:
-            async with self.condition:
-                await asyncio.wait_for(
-                    self.condition.wait_for(lambda: self.request_queue.empty() and self.active_workers._value == self.workers),
-                    timeout=self.timeout,
-                )
-        except asyncio.TimeoutError:
-            logger.warning("Timeout reached")
+            # Offers indexed by previous scrapes can be pushed right away, before the first page is even fetched
+            for point in await async_qdrant_client.search(
+                collection_name=JOB_COLLECTION,
+                query_vector=search_vector,
+                query_filter={"must_not": [{"key": "reference", "match": {"any": list(sent)}}]},  # type: ignore
+                with_vectors=False,
+                with_payload=True,
+                limit=num_results,
+            ):
+                job_offer = JobOffer(**point.payload)  # type: ignore
+                candidates[job_offer.reference] = RankedJobOffer(score=point.score, job_offer=job_offer)
 
-        self.scrape_statuses[scrape_id] = ScrapeStatus.FINISHED
-        for scraper in self.scrapers:
-            scraper.set_cache(search_query, location, num_results * scraper.results_multiplier)
+            loop = asyncio.get_running_loop()
+            finished = False
+
+            def receive(item: Optional[tuple[JobOffer, list[float]]]) -> None:
+                nonlocal finished
+                if item is None:
+                    finished = True
+                elif (job_offer := item[0]).reference not in sent:
+                    score = cosine_similarity(search_vector, item[1])
+                    candidates[job_offer.reference] = RankedJobOffer(score=score, job_offer=job_offer)
+
+            for _ in range(num_results):
+                if not candidates and not finished:
+                    while not candidates and not finished:
+                        receive(await results.get())
+                    # The offers ingested right after this one are ranked along with it
+                    deadline = loop.time() + self.stream_window
+                    while not finished and (timeout := deadline - loop.time()) > 0:
+                        try:
+                            receive(await asyncio.wait_for(results.get(), timeout=timeout))
+                        except asyncio.TimeoutError:
+                            break
+                while not finished and not results.empty():
+                    receive(results.get_nowait())
+                if not candidates:
+                    break
+                best = max(candidates.values(), key=lambda candidate: candidate.score)
+                del candidates[best.job_offer.reference]
+                sent.add(best.job_offer.reference)
+                yield best
+        finally:
+            await self.result_stream.unsubscribe(scrape_id, results)
+
+    def _scrape_done(self, task: asyncio.Task) -> None:
+        self.scrape_tasks.discard(task)
+        if not task.cancelled() and (error := task.exception()) is not None:
+            logger.opt(exception=error).error(f"Background scrape failed: {error}")
 
-    def get_scrape_status(self, scrape_id: UUID) -> ScrapeStatus:
-        return self.scrape_statuses.get(scrape_id, ScrapeStatus.NOT_FOUND)
+    async def get_scrape_status(self, scrape_id: UUID) -> ScrapeProgress:
+        return await self.progress.get(scrape_id)
 
 
 scraper_aggregator = ScraperAggregator()
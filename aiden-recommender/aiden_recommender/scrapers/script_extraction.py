@@ -0,0 +1,50 @@
+import re
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+_SCRIPT_TAG = re.compile(r"<script\b([^>]*)>(.*?)</script\s*>", re.DOTALL | re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+
+def _attributes(tag: str) -> dict[str, str]:
+    return {match[1].lower(): next(value for value in match.groups()[1:] if value is not None) for match in _ATTRIBUTE.finditer(tag)}
+
+
+def find_script(html: str, attrs: dict[str, str] = {}, containing: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the text of the first script tag with the given attributes and containing the given text,
+    like soup.find("script", attrs) would, by scanning the raw html instead of building a DOM.
+    Returns None when no script matches, callers then fall back to find_script_in_soup.
+    """
+    # Jump straight to the first occurrence of the searched text, the script holding it can't start after it
+    position = html.find(containing) if containing is not None else 0
+    if position < 0:
+        return None
+    if containing is not None:
+        position = html.rfind("<script", 0, position)
+        if position < 0:
+            return None
+    for match in _SCRIPT_TAG.finditer(html, position):
+        if containing is not None and containing not in match[2]:
+            continue
+        tag_attributes = _attributes(match[1])
+        if all(tag_attributes.get(name) == value for name, value in attrs.items()):
+            return match[2]
+    return None
+
+
+def find_script_in_soup(html: str, attrs: dict[str, str] = {}, containing: Optional[str] = None) -> Optional[str]:
+    """Slow path of find_script, building the whole DOM."""
+    soup = BeautifulSoup(html, "html.parser")
+    if containing is not None:
+        script = soup.find("script", attrs, string=lambda text: text is not None and containing in text)
+    else:
+        script = soup.find("script", attrs)
+    return script.get_text() if script is not None else None
+
+
+def extract_script(html: str, attrs: dict[str, str] = {}, containing: Optional[str] = None) -> Optional[str]:
+    if (script := find_script(html, attrs, containing)) is not None:
+        return script
+    return find_script_in_soup(html, attrs, containing)
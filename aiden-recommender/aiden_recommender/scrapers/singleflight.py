@@ -0,0 +1,35 @@
+from typing import Optional
+
+from aiden_recommender.models import Request
+
+
+class SingleFlight:
+    """
+    Keeps track of the requests being sent, keyed by their cache keys.
+    An identical request arriving in the meantime is not sent again, its scrapes share the result and follow ups of the first one.
+    """
+
+    def __init__(self):
+        self.leaders: dict[tuple[str, ...], Request] = {}
+        self.coalesced = 0
+
+    @staticmethod
+    def _key(request: Request) -> tuple[str, ...]:
+        return (type(request).__name__, *request._generate_cache_keys())
+
+    def join(self, request: Request) -> Optional[Request]:
+        """Returns the identical request already in flight, or registers this one as the leader and returns None."""
+        key = self._key(request)
+        if (leader := self.leaders.get(key)) is not None:
+            self.coalesced += 1
+            return leader
+        self.leaders[key] = request
+        return None
+
+    def finish(self, request: Request) -> None:
+        key = self._key(request)
+        if self.leaders.get(key) is request:
+            del self.leaders[key]
+
+    def stats(self) -> dict[str, float]:
+        return {"in_flight": len(self.leaders), "coalesced": self.coalesced}
@@ -1,4 +1,5 @@
 import hashlib
+import inspect
 import json
 from datetime import timedelta
 from functools import wraps
@@ -9,34 +10,58 @@ from pydantic import BaseModel
 from pydantic_core import from_json
 from bs4 import BeautifulSoup
 
-from aiden_shared.tools import redis_client
-from aiden_recommender.tools import zyte_session
+from aiden_shared.tools import async_redis_client, redis_client
+from aiden_recommender.zyte_client import zyte_client
 
 T = TypeVar("T", bound="BaseModel")
 
 
+def _load_cached(cached_result: str, model: Type[T]) -> T | list[T]:
+    if isinstance(results := json.loads(cached_result), list):
+        return [model.model_validate(from_json(r)) for r in results]
+    else:
+        return model.model_validate(results)
+
+
+def _dump_result(result: T | list[T], model: Type[T]) -> str:
+    if isinstance(result, list):
+        return json.dumps([model.model_dump_json() for model in result])
+    return result.model_dump_json() if model else json.dumps(result)
+
+
 def cache(retention_period: timedelta, model: Type[T], source: Optional[str] = "default"):
     def decorator(func):
+        signature = inspect.signature(func)
+        # Coroutine functions are cached through the async redis client, so that they never block the event loop
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = _generate_cache_key(func, signature, source, *args, **kwargs)
+                cached_result: str | None = await async_redis_client.get(key)  # type: ignore
+                if cached_result is not None:
+                    logger.warning("Cache HIT")
+                    return _load_cached(cached_result, model)
+                result = await func(*args, **kwargs)
+                await async_redis_client.setex(key, retention_period, _dump_result(result, model))
+                return result
+
+            return async_wrapper
+
         @wraps(func)
-        def wrapper(self, *args, **kwargs):
+        def wrapper(*args, **kwargs):
             # Generate a unique cache key based on function name and arguments
-            key = _generate_cache_key(func, source, *args, **kwargs)
+            key = _generate_cache_key(func, signature, source, *args, **kwargs)
 
             # Try to get the cached result
             cached_result: str | None = redis_client.get(key)  # type: ignore
             if cached_result is not None:
                 logger.warning("Cache HIT")
-                if isinstance(results := json.loads(cached_result), list):
-                    return [model.model_validate(from_json(r)) for r in results]
-                else:
-                    return model.model_validate(results)
+                return _load_cached(cached_result, model)
 
             # Call the function and cache the result
-            result: model | list[model] = func(self, *args, **kwargs)
-            if isinstance(result, list):
-                redis_client.setex(key, retention_period, json.dumps([model.model_dump_json() for model in result]))
-            else:
-                redis_client.setex(key, retention_period, result.model_dump_json() if model else json.dumps(result))
+            result: model | list[model] = func(*args, **kwargs)
+            redis_client.setex(key, retention_period, _dump_result(result, model))
 
             return result
 
@@ -45,9 +70,13 @@ def cache(retention_period: timedelta, model: Type[T], source: Optional[str] = "
     return decorator
 
 
-def _generate_cache_key(func, source, *args, **kwargs):
+def _generate_cache_key(func, signature: inspect.Signature, source, *args, **kwargs):
+    # Every argument is part of the key, by name so that positional and keyword calls share it. The instance of a method isn't.
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = {name: value for name, value in bound.arguments.items() if name not in ("self", "cls")}
     # Create a string representation of the function name and arguments
-    key_data = {"function": func.__name__, "args": args, "kwargs": kwargs, "source": source}
+    key_data = {"function": func.__name__, "arguments": arguments, "source": source}
     key_string = json.dumps(key_data, sort_keys=True)
 
     # Use a hash to ensure the key length is suitable for Redis
@@ -63,9 +92,9 @@ base_fields = {
 }
 
 
-def extract_form_fields(apply_url: str) -> dict[str, Any]:
+async def extract_form_fields(apply_url: str) -> dict[str, Any]:
     try:
-        response = zyte_session.post("https://api.zyte.com/v1/extract", {"url": apply_url, "browserHtml": True, "httpResponseBody": False})
+        response = await zyte_client.get({"url": apply_url, "browserHtml": True, "httpResponseBody": False})
         soup = BeautifulSoup(response["browserHtml"], "html.parser")
     except Exception as e:
         print(f"Error fetching the form: {e}")
@@ -0,0 +1,106 @@
+import asyncio
+import json
+from base64 import b64decode
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional
+from urllib.parse import urlencode
+
+from loguru import logger
+
+from aiden_shared.tools import async_redis_client
+from aiden_recommender.canonical import gazetteer, location_key
+from aiden_recommender.zyte_client import zyte_client
+
+Position = dict[str, float]
+
+
+class Geocoder:
+    """
+    Resolves the location of a WTJ search to the position its Algolia query is centered on.
+    Places of the gazetteer are resolved offline, without any network call. Other locations are geocoded once
+    by HERE through Zyte, their answer is shared by every process through Redis and the latest ones are kept in memory.
+    Locations HERE doesn't know are cached in Redis as well, for a shorter time, so that they are not geocoded on every search.
+    """
+
+    def __init__(
+        self,
+        url: str = "https://geocode.search.hereapi.com/v1/geocode",
+        max_size: int = 10_000,
+        retention_period: timedelta = timedelta(days=30),
+        not_found_retention_period: timedelta = timedelta(days=1),
+    ):
+        self.url = url
+        self.max_size = max_size
+        self.retention_period = retention_period
+        self.not_found_retention_period = not_found_retention_period
+        self.positions: OrderedDict[str, Position] = OrderedDict()
+        # Concurrent searches of the same unknown location share a single HERE lookup
+        self.pending: dict[str, asyncio.Task] = {}
+        self.offline_hits = 0
+        self.cache_hits = 0
+        self.here_lookups = 0
+
+    @staticmethod
+    def _key(location: str) -> str:
+        return f"wtj-geocode-{location_key(location)}"
+
+    def locate(self, location: str) -> Optional[Position]:
+        """Position of location if it is in the gazetteer or has already been resolved, without any network call."""
+        if (place := gazetteer.find(location)) is not None:
+            return {"lat": place.lat, "lng": place.lng}
+        if (position := self.positions.get(location)) is not None:
+            self.positions.move_to_end(location)
+        return position
+
+    async def resolve(self, location: str, here_api_key: str) -> Optional[Position]:
+        """Position of location, looked up in Redis then geocoded by HERE when locate doesn't know it. None if HERE doesn't either."""
+        if gazetteer.find(location) is not None:
+            self.offline_hits += 1
+        elif location in self.positions:
+            self.cache_hits += 1
+        else:
+            if (task := self.pending.get(location)) is None:
+                task = self.pending[location] = asyncio.create_task(self._resolve(location, here_api_key))
+                task.add_done_callback(lambda _: self.pending.pop(location, None))
+            return await asyncio.shield(task)
+        return self.locate(location)
+
+    async def _resolve(self, location: str, here_api_key: str) -> Optional[Position]:
+        if (cached := await async_redis_client.get(self._key(location))) is not None:
+            self.cache_hits += 1
+            position = json.loads(cached)
+        else:
+            try:
+                position = await self._geocode(location, here_api_key)
+            except Exception as e:
+                # Nothing is cached, the next search of the location tries again
+                logger.error(f"Failed to geocode {location}: {e}")
+                return None
+            retention_period = self.retention_period if position is not None else self.not_found_retention_period
+            await async_redis_client.setex(self._key(location), retention_period, json.dumps(position))
+        if position is not None:
+            self.positions[location] = position
+            self.positions.move_to_end(location)
+            if len(self.positions) > self.max_size:
+                self.positions.popitem(last=False)
+        return position
+
+    async def _geocode(self, location: str, here_api_key: str) -> Optional[Position]:
+        self.here_lookups += 1
+        logger.info(f"Geocoding {location} with HERE")
+        params = {"apiKey": here_api_key, "lang": "fr", "q": location}
+        response = await zyte_client.get({"url": f"{self.url}?{urlencode(params)}", "httpResponseBody": True})
+        items = json.loads(b64decode(response["httpResponseBody"]))["items"]
+        return items[0]["position"] if items else None
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "size": len(self.positions),
+            "offline_hits": self.offline_hits,
+            "cache_hits": self.cache_hits,
+            "here_lookups": self.here_lookups,
+        }
+
+
+geocoder = Geocoder()
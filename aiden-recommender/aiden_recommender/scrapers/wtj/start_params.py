@@ -0,0 +1,126 @@
+import asyncio
+import json
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from aiden_shared.tools import async_redis_client
+
+
+class StartParams(BaseModel):
+    algolia_app_id: str
+    algolia_api_key: str
+    here_api_key: str
+    api_auth_cookies: list[dict[str, Any]]
+    csrf_token: str
+
+
+class StartParamsCache:
+    """
+    Serves the WTJ start params stale-while-revalidate, without ever fetching them at import.
+    They are shared by every process through Redis, where they expire after max_age, and kept in memory.
+    Once they are older than refresh_after they are refreshed in the background, by one process at a time,
+    while the current ones keep being served. The refresh loop also refreshes them when no search asks for them.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[StartParams]],
+        key: str = "wtj-start-params",
+        refresh_after: timedelta = timedelta(hours=10),
+        max_age: timedelta = timedelta(hours=12),
+        check_interval: float = 600,
+        lock_timeout: int = 120,
+    ):
+        self.fetch = fetch
+        self.key = key
+        self.refresh_after = refresh_after.total_seconds()
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self.lock_timeout = lock_timeout
+        self.value: Optional[StartParams] = None
+        self.fetched_at = 0.0
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.loop_task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failed_refreshes = 0
+
+    def _is_stale(self) -> bool:
+        return time.time() - self.fetched_at >= self.refresh_after
+
+    async def _load_shared(self) -> None:
+        # Adopts the copy in Redis when it is newer, e.g. refreshed by another process
+        if (cached := await async_redis_client.get(self.key)) is None:
+            return
+        data = json.loads(cached)
+        if data["fetched_at"] > self.fetched_at:
+            self.value = StartParams.model_validate(data["params"])
+            self.fetched_at = data["fetched_at"]
+
+    async def _wait_shared(self, poll_interval: float = 1.0) -> None:
+        # Without any params to serve, waits for the process holding the lock to share its result
+        deadline = time.monotonic() + self.lock_timeout
+        while self.value is None and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            await self._load_shared()
+
+    async def _refresh(self) -> None:
+        try:
+            await self._load_shared()
+            if self.value is not None and not self._is_stale():
+                return
+            # Only one process renders the WTJ home page, the others adopt its result on their next check
+            if not await async_redis_client.set(f"{self.key}-lock", 1, nx=True, ex=self.lock_timeout):
+                await self._wait_shared()
+                return
+            try:
+                value = await self.fetch()
+                fetched_at = time.time()
+                await async_redis_client.setex(self.key, self.max_age, json.dumps({"fetched_at": fetched_at, "params": value.model_dump()}))
+                self.value, self.fetched_at = value, fetched_at
+                self.refreshes += 1
+            finally:
+                await async_redis_client.delete(f"{self.key}-lock")
+        except Exception as e:
+            # The current params keep being served, the next check retries
+            self.failed_refreshes += 1
+            logger.error(f"Failed to refresh the WTJ start params: {e}")
+        finally:
+            self.refresh_task = None
+
+    def _schedule_refresh(self) -> asyncio.Task:
+        if self.refresh_task is None:
+            self.refresh_task = asyncio.create_task(self._refresh())
+        return self.refresh_task
+
+    async def get(self, wait: bool = False) -> Optional[StartParams]:
+        """
+        Returns the current params and schedules a refresh when they are stale.
+        Without params yet, only wait=True callers wait for the refresh, the others get None.
+        """
+        if self.value is None:
+            await self._load_shared()
+        if self.value is None or self._is_stale():
+            refresh_task = self._schedule_refresh()
+            if self.value is None and wait:
+                await asyncio.shield(refresh_task)
+        return self.value
+
+    def start(self) -> None:
+        if self.loop_task is None:
+            self.loop_task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await self.get()
+            await asyncio.sleep(self.check_interval)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "age": time.time() - self.fetched_at if self.value is not None else -1.0,
+            "refreshes": self.refreshes,
+            "failed_refreshes": self.failed_refreshes,
+        }
@@ -0,0 +1,118 @@
+import importlib
+import json
+from functools import partial
+from types import FunctionType, MethodType
+from typing import Any, Callable
+
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+# Packages whose models can be loaded back, a model must be defined at the top level of one of their modules
+ALLOWED_MODULES = ("aiden_recommender.", "aiden_shared.", "mistralai.")
+
+# Objects whose bound methods can be used as callbacks, e.g. the scraper singletons
+callback_owners: dict[str, object] = {}
+
+# Plain functions that can be used as callbacks, by import path. A queue entry can only name one of these
+callback_functions: dict[str, Callable] = {}
+
+
+def register_callback_owner(name: str, owner: object) -> None:
+    callback_owners[name] = owner
+
+
+def register_callback_function(func: Callable) -> Callable:
+    callback_functions[_path(func)] = func
+    return func
+
+
+def _owner_name(owner: object) -> str:
+    for name, registered in callback_owners.items():
+        if registered is owner:
+            return name
+    raise TypeError(f"{type(owner).__name__} is not a registered callback owner")
+
+
+def _path(obj: Any) -> str:
+    return f"{obj.__module__}:{obj.__qualname__}"
+
+
+def _function_path(func: FunctionType) -> str:
+    if (path := _path(func)) not in callback_functions:
+        raise TypeError(f"{path} is not a registered callback function")
+    return path
+
+
+def _resolve_function(path: str) -> Callable:
+    if (func := callback_functions.get(path)) is None:
+        raise ValueError(f"Refusing to load {path}")
+    return func
+
+
+def _resolve_method(owner_name: str, method_name: str) -> Callable:
+    method = getattr(callback_owners[owner_name], method_name, None) if not method_name.startswith("__") else None
+    if not isinstance(method, MethodType) or method.__self__ is not callback_owners[owner_name]:
+        raise ValueError(f"Refusing to load {owner_name}.{method_name}")
+    return method
+
+
+def _resolve_model(path: str) -> type[BaseModel]:
+    # Only a top level model class defined in the module it is loaded from, attributes are never followed
+    module_name, _, name = path.partition(":")
+    if not module_name.startswith(ALLOWED_MODULES) or not name.isidentifier():
+        raise ValueError(f"Refusing to load {path}")
+    model = getattr(importlib.import_module(module_name), name, None)
+    if not (isinstance(model, type) and issubclass(model, BaseModel)) or model.__module__ != module_name:
+        raise ValueError(f"{path} is not a model")
+    return model
+
+
+def encode(value: Any) -> Any:
+    """
+    Turns requests and their callbacks into json compatible values.
+    Callbacks are encoded by reference: bound methods by the name of their registered owner, registered functions by their import path.
+    Partial arguments and model fields are encoded recursively.
+    """
+    if isinstance(value, partial):
+        return {"__partial__": {"func": encode(value.func), "args": encode(list(value.args)), "kwargs": encode(value.keywords)}}
+    if isinstance(value, MethodType):
+        return {"__method__": [_owner_name(value.__self__), value.__func__.__name__]}
+    if isinstance(value, FunctionType):
+        return {"__function__": _function_path(value)}
+    if isinstance(value, BaseModel):
+        fields = {name: encode(getattr(value, name)) for name in type(value).model_fields}
+        return {"__model__": _path(type(value)), "fields": fields}
+    if isinstance(value, dict):
+        return {"__dict__": {key: encode(item) for key, item in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    return to_jsonable_python(value)
+
+
+def decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__partial__" in value:
+        spec = value["__partial__"]
+        return partial(decode(spec["func"]), *decode(spec["args"]), **decode(spec["kwargs"]))
+    if "__method__" in value:
+        return _resolve_method(*value["__method__"])
+    if "__function__" in value:
+        return _resolve_function(value["__function__"])
+    if "__model__" in value:
+        model = _resolve_model(value["__model__"])
+        return model(**{name: decode(field) for name, field in value["fields"].items()})
+    if "__dict__" in value:
+        return {key: decode(item) for key, item in value["__dict__"].items()}
+    # Plain json objects, e.g. the values of a set or a model field already dumped by pydantic
+    return value
+
+
+def dumps(value: Any) -> str:
+    return json.dumps(encode(value))
+
+
+def loads(data: str | bytes) -> Any:
+    return decode(json.loads(data))
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+from loguru import logger
+from qdrant_client.models import PointStruct
+
+from aiden_shared.constants import JOB_COLLECTION
+from aiden_shared.tools import async_qdrant_client
+from aiden_recommender.rate_limiter import limiters
+
+
+class QdrantUpsertBuffer:
+    """
+    Accumulates the points of every QdrantRequest and writes them with a single batched upsert.
+    The buffer is flushed when it holds max_points points, when its oldest point has waited max_wait seconds, and on shutdown.
+    Each worker waits for the batch holding its points, so the buffer never holds more requests than there are workers:
+    max_points must stay below the number of workers, or every batch waits for the max_wait timer.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        max_points: int = int(os.getenv("QDRANT_UPSERT_MAX_POINTS", 32)),
+        max_wait: float = float(os.getenv("QDRANT_UPSERT_MAX_WAIT", 0.005)),
+    ):
+        self.collection_name = collection_name
+        self.max_points = max_points
+        self.max_wait = max_wait
+        self.points: dict[str, PointStruct] = {}
+        self.waiters: list[asyncio.Future] = []
+        self.flush_task: Optional[asyncio.Task] = None
+        self.max_depth = 0
+        self.flushes = 0
+        self.points_flushed = 0
+        self.last_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    async def upsert(self, points: list[PointStruct]) -> None:
+        """Buffers the points and waits until the batch containing them has been written."""
+        waiter = asyncio.get_running_loop().create_future()
+        for point in points:
+            # Points are keyed by id, the same offer scraped twice is only written once
+            self.points[point.id] = point
+        self.waiters.append(waiter)
+        self.max_depth = max(self.max_depth, len(self.points))
+        if len(self.points) >= self.max_points:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+        await waiter
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_wait)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        if not self.points:
+            return
+        points = list(self.points.values())
+        waiters = self.waiters
+        self.points = {}
+        self.waiters = []
+        start = time.perf_counter()
+        try:
+            # The upsert of the whole batch is the actual call to Qdrant, so this is where its limiter applies
+            async with limiters["qdrant"].slot():
+                await async_qdrant_client.upsert(collection_name=self.collection_name, points=points)
+        except Exception as e:
+            logger.error(f"Failed to upsert {len(points)} points: {e}")
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+        else:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+        finally:
+            self.last_flush_latency = time.perf_counter() - start
+            self.total_flush_latency += self.last_flush_latency
+            self.flushes += 1
+            self.points_flushed += len(points)
+            logger.info(f"Upserted {len(points)} points in {self.last_flush_latency:.3f}s")
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "buffer_depth": len(self.points),
+            "max_buffer_depth": self.max_depth,
+            "flushes": self.flushes,
+            "points_flushed": self.points_flushed,
+            "last_flush_latency": self.last_flush_latency,
+            "mean_flush_latency": self.total_flush_latency / self.flushes if self.flushes else 0.0,
+        }
+
+
+qdrant_upsert_buffer = QdrantUpsertBuffer(collection_name=JOB_COLLECTION)
@@ -0,0 +1,59 @@
+import asyncio
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+from aiden_shared.constants import USER_COLLECTION
+from aiden_shared.tools import async_qdrant_client
+
+
+class UserVectorCache:
+    """
+    Keeps the profile vectors of the latest users in memory, so that a search only costs one Qdrant round trip.
+    The web app uploads every new or edited profile under a new point id, so a changed profile is a cache miss and
+    cached vectors never go stale. Entries are still dropped after ttl seconds, and writers that would overwrite
+    a point in place call invalidate.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.vectors: OrderedDict[UUID, tuple[float, list[float]]] = OrderedDict()
+        # Concurrent searches of a user missing from the cache share a single retrieve
+        self.pending: dict[UUID, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, profile_id: UUID) -> list[float]:
+        if (cached := self.vectors.get(profile_id)) is not None and time.monotonic() - cached[0] < self.ttl:
+            self.vectors.move_to_end(profile_id)
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        if (task := self.pending.get(profile_id)) is None:
+            task = self.pending[profile_id] = asyncio.create_task(self._retrieve(profile_id))
+            task.add_done_callback(lambda _: self.pending.pop(profile_id, None))
+        return await asyncio.shield(task)
+
+    async def _retrieve(self, profile_id: UUID) -> list[float]:
+        points = await async_qdrant_client.retrieve(collection_name=USER_COLLECTION, ids=[str(profile_id)], with_vectors=True)
+        if not points:
+            raise RuntimeError("User not present found in vector DB")
+        if (vector := points[0].vector) is None:
+            raise RuntimeError("User has no vector embedding.")
+        self.vectors[profile_id] = (time.monotonic(), vector)  # type: ignore
+        self.vectors.move_to_end(profile_id)
+        if len(self.vectors) > self.max_size:
+            self.vectors.popitem(last=False)
+        return vector  # type: ignore
+
+    def invalidate(self, profile_id: UUID) -> None:
+        # A retrieve started before the change is not shared with the next searches either
+        self.pending.pop(profile_id, None)
+        self.vectors.pop(profile_id, None)
+
+    def stats(self) -> dict[str, float]:
+        return {"size": len(self.vectors), "hits": self.hits, "misses": self.misses}
+
+
+user_vector_cache = UserVectorCache()
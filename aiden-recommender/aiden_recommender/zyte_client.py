@@ -0,0 +1,96 @@
+import asyncio
+import os
+import random
+from typing import Any, Optional
+
+import aiohttp
+from tenacity import retry_if_exception, stop_after_attempt, wait_fixed, wait_random
+from zyte_api import AsyncZyteAPI, RequestError, RetryFactory
+
+from aiden_shared.tools import LazyClient
+from aiden_recommender.rate_limiter import limiters
+
+
+def is_zyte_throttling_error(error: BaseException) -> bool:
+    # The statuses zyte-api retries as throttling
+    return isinstance(error, RequestError) and error.status in (429, 503)
+
+
+class BoundedRetryFactory(RetryFactory):
+    """
+    Retries network and temporary download errors a bounded number of times, about a second apart.
+    The default zyte-api policy retries network errors for 15 minutes, waiting up to a minute between attempts, which would
+    hold a limiter slot, or an endpoint call, far beyond the timeout of a scrape.
+    Throttling errors are not retried here: they are raised on the first attempt, so that the zyte limiter backs off at once,
+    and ZyteClient.get retries them through the limiter.
+    """
+
+    retry_condition = retry_if_exception(lambda error: not is_zyte_throttling_error(error)) & RetryFactory.retry_condition
+
+    def __init__(self, max_attempts: int):
+        self.network_error_stop = stop_after_attempt(max_attempts)
+        self.temporary_download_error_stop = stop_after_attempt(max_attempts)
+        self.network_error_wait = self.temporary_download_error_wait = wait_fixed(0.5) + wait_random(0, 1)
+
+
+class ZyteClient:
+    """
+    Async access to Zyte API shared by every scraper and the form finder.
+    Calls share one pooled keep-alive aiohttp session, bounded retries, and the zyte limiter.
+    A throttled call gives its limiter slot back, the limiter halves its concurrency, and the call is retried under the new limit.
+    """
+
+    def __init__(self, api_key: Optional[str], n_conn: int = 48, max_attempts: int = 4, timeout: float = 120):
+        # AsyncZyteAPI requires the api key, it is only created on first use
+        self.client: AsyncZyteAPI = LazyClient(  # type: ignore[assignment]
+            lambda: AsyncZyteAPI(api_key=api_key, n_conn=n_conn, retrying=BoundedRetryFactory(max_attempts).build())
+        )
+        self.n_conn = n_conn
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        # The session is bound to the loop it was created in, it is created again for a new loop
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self.session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.n_conn, keepalive_timeout=30)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self.session_loop = loop
+        return self.session
+
+    async def get(self, query: dict[str, Any]) -> dict[str, Any]:
+        """Sends the query to the extract endpoint, within a zyte limiter slot."""
+        attempt = 1
+        while True:
+            try:
+                async with limiters["zyte"].slot():
+                    return await self.client.get(query, session=self._session())
+            except RequestError as e:
+                if not is_zyte_throttling_error(e) or attempt >= self.max_attempts:
+                    raise
+            attempt += 1
+            await asyncio.sleep(random.uniform(0.5, 1.5))
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    def stats(self) -> dict[str, float]:
+        if not self.client._lazy_created():  # type: ignore[attr-defined]
+            return {"attempts": 0, "successes": 0, "errors": 0, "fatal_errors": 0}
+        agg_stats = self.client.agg_stats
+        return {
+            "attempts": agg_stats.n_attempts,
+            "successes": agg_stats.n_success,
+            "errors": agg_stats.n_errors,
+            "fatal_errors": agg_stats.n_fatal_errors,
+        }
+
+
+zyte_client = ZyteClient(
+    api_key=os.getenv("ZYTE_API_KEY"),
+    n_conn=int(os.getenv("ZYTE_MAX_CONNECTIONS", 48)),
+    max_attempts=int(os.getenv("ZYTE_MAX_ATTEMPTS", 4)),
+)
@@ -0,0 +1,110 @@
+"""
+Drives an UpstreamLimiter against a local fake upstream to check that its concurrency limit adapts to the upstream capacity.
+
+    poetry run python -m benchmarks.aimd_simulation --capacity 16 --throttle-at 24 --capacity-change 0.25
+
+The fake upstream answers in `latency` seconds up to `capacity` concurrent calls, slows down linearly above it,
+and answers 429 above `throttle_at` concurrent calls. Halfway through the run its capacity is multiplied by `capacity_change`:
+with the defaults it drops to a quarter, the calls in flight get a burst of 429s and the concurrency limit must drop with them.
+"""
+
+import argparse
+import asyncio
+import time
+
+from aiden_recommender.rate_limiter import UpstreamLimiter
+
+
+class FakeThrottlingError(Exception):
+    status = 429
+
+
+class FakeUpstream:
+    def __init__(self, latency: float, capacity: int, throttle_at: int):
+        self.latency = latency
+        self.capacity = capacity
+        self.throttle_at = throttle_at
+        self.in_flight = 0
+
+    async def call(self) -> None:
+        self.in_flight += 1
+        try:
+            if self.in_flight > self.throttle_at:
+                await asyncio.sleep(self.latency / 10)
+                raise FakeThrottlingError()
+            await asyncio.sleep(self.latency * max(1.0, self.in_flight / self.capacity))
+        finally:
+            self.in_flight -= 1
+
+
+async def client(limiter: UpstreamLimiter, upstream: FakeUpstream, deadline: float) -> tuple[int, int]:
+    succeeded, throttled = 0, 0
+    while time.monotonic() < deadline:
+        try:
+            async with limiter.slot():
+                await upstream.call()
+            succeeded += 1
+        except FakeThrottlingError:
+            throttled += 1
+    return succeeded, throttled
+
+
+async def report(limiter: UpstreamLimiter, upstream: FakeUpstream, deadline: float, interval: float) -> list[tuple[float, int]]:
+    start = time.monotonic()
+    limits = []
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        stats = limiter.stats()
+        limits.append((time.monotonic() - start, stats["concurrency_limit"]))
+        print(
+            f"t={time.monotonic() - start:5.1f}s capacity={upstream.capacity:3d} limit={stats['concurrency_limit']:3d} "
+            f"in_flight={stats['in_flight']:3d} throttled={stats['throttled_calls']:5d} mean_latency={stats['mean_latency']:.3f}s"
+        )
+    return limits
+
+
+async def change_capacity(upstream: FakeUpstream, delay: float, factor: float) -> None:
+    await asyncio.sleep(delay)
+    upstream.capacity = max(1, int(upstream.capacity * factor))
+    upstream.throttle_at = max(upstream.capacity, int(upstream.throttle_at * factor))
+
+
+async def main(args: argparse.Namespace) -> None:
+    upstream = FakeUpstream(latency=args.latency, capacity=args.capacity, throttle_at=args.throttle_at)
+    limiter = UpstreamLimiter(
+        name="fake",
+        rate=args.rate,
+        burst=int(args.rate),
+        max_concurrency=args.max_concurrency,
+        min_concurrency=args.min_concurrency,
+        target_latency=args.latency * 2,
+        initial_concurrency=args.initial_concurrency,
+    )
+    deadline = time.monotonic() + args.duration
+    results = await asyncio.gather(
+        *[client(limiter, upstream, deadline) for _ in range(args.clients)],
+        report(limiter, upstream, deadline, interval=args.duration / 20),
+        change_capacity(upstream, args.duration / 2, args.capacity_change),
+    )
+    succeeded = sum(result[0] for result in results[: args.clients])
+    throttled = sum(result[1] for result in results[: args.clients])
+    print(f"{succeeded} calls succeeded, {throttled} were throttled ({succeeded / args.duration:.1f} calls/s)")
+    limits = results[args.clients]
+    before = max(limit for at, limit in limits if at <= args.duration / 2)
+    after = min(limit for at, limit in limits if at > args.duration / 2)
+    print(f"concurrency limit peaked at {before} before the capacity change and fell to {after} after it")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent callers, the equivalent of the request workers")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--capacity", type=int, default=16)
+    parser.add_argument("--throttle-at", type=int, default=24)
+    parser.add_argument("--capacity-change", type=float, default=0.25)
+    parser.add_argument("--rate", type=float, default=10000.0)
+    parser.add_argument("--min-concurrency", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--initial-concurrency", type=int, default=None, help="Defaults to --min-concurrency")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""
+Replays spelling variants of popular searches and compares the cache hit rate of raw and canonical cache keys.
+
+    poetry run python -m benchmarks.canonicalisation
+
+The first search of each distinct key is a miss, every later search with the same key is a hit.
+"""
+
+import argparse
+import time
+
+from aiden_recommender.canonical import canonical_search
+
+# (query, location) as typed by users, several variants of the same few searches
+SEARCHES = [
+    ("Data Engineer", "Paris"),
+    ("data engineer", "paris"),
+    ("Data engineer ", "Paris, France"),
+    ("DATA ENGINEER", "Paris 75"),
+    ("data  engineer", "75011 Paris"),
+    ("Data Engineer", "Paris 11e"),
+    ("Développeur Python", "Lyon"),
+    ("developpeur python", "lyon"),
+    ("Développeur python", "Lyon 3ème arrondissement"),
+    ("développeur Python", "Lyon, Auvergne-Rhône-Alpes, France"),
+    ("Product Manager", "Saint-Étienne"),
+    ("product manager", "St Etienne"),
+    ("Product manager", "saint etienne"),
+    ("Ingénieur DevOps", "Île-de-France"),
+    ("ingenieur devops", "IDF"),
+    ("Ingénieur devops", "ile de france"),
+    ("Data Scientist", "Sophia Antipolis"),
+    ("data scientist", "Sophia-Antipolis"),
+    ("Data scientist", "Courbevoie"),
+    ("data scientist", "92400 Courbevoie Cedex"),
+    ("Développeur C++", "Toulouse"),
+    ("développeur c++", "toulouse (31)"),
+    ("Comptable", "Bordeaux"),
+    ("comptable", "Bordeaux, France"),
+]
+
+
+def hit_rate(keys: list[tuple[str, str]]) -> float:
+    seen: set[tuple[str, str]] = set()
+    hits = 0
+    for key in keys:
+        hits += key in seen
+        seen.add(key)
+    return hits / len(keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1000, help="Canonicalisations timed to report the cost per search")
+    args = parser.parse_args()
+
+    canonical = [canonical_search(query, location) for query, location in SEARCHES]
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for query, location in SEARCHES:
+            canonical_search(query, location)
+    elapsed = (time.perf_counter() - start) / (args.repeat * len(SEARCHES))
+
+    print(f"searches            {len(SEARCHES)}")
+    print(f"raw keys            {len(set(SEARCHES)):>4}  hit rate {hit_rate(SEARCHES):.0%}")
+    print(f"canonical keys      {len(set(canonical)):>4}  hit rate {hit_rate(canonical):.0%}")
+    print(f"canonicalisation    {elapsed * 1e6:.1f}us per search")
+
+
+if __name__ == "__main__":
+    main()
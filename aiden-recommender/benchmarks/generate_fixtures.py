@@ -0,0 +1,299 @@
+"""
+Generates the synthetic fixtures of the offline benchmarks in benchmarks/fixtures: result pages and result records.
+
+    poetry run python -m benchmarks.generate_fixtures
+
+The fixtures are not captures of real pages. They reproduce the structure the scrapers rely on, the script tags and
+the fields of the records, filled with random words, placeholder ids and fake keys, and padded with markup
+(styles, analytics scripts, cards, links) to the size of a browser rendered page. Real pages differ in their markup,
+so the numbers measured on them only compare implementations with each other, they are not production throughputs.
+The records cover the optional fields each source omits or nulls, they are not a sample of real offers either.
+Generation is seeded, running it again rewrites the same files.
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+WORDS = "data engineer python cloud senior analyste développeur paris lyon équipe produit agile cdi télétravail salaire avantages".split()
+
+
+class Text:
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+
+    def __call__(self, n: int) -> str:
+        return " ".join(self.random.choice(WORDS) for _ in range(n))
+
+
+def generate_pages() -> dict[str, str]:
+    """Indeed overview and detail pages and the WTJ home page, with the script each scraper extracts."""
+    text = Text(7)
+
+    def head(title: str, extra_scripts: str) -> str:
+        links = "\n".join(f'<link rel="preload" href="/assets/chunk-{i:03d}.js" as="script">' for i in range(40))
+        metas = "\n".join(f'<meta name="m{i}" content="{text(6)}">' for i in range(30))
+        style = "<style>" + "\n".join(f".c{i}{{margin:{i % 7}px;padding:{i % 5}px;color:#{i % 999:03d}}}" for i in range(600)) + "</style>"
+        return (
+            f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>{title}</title>\n'
+            f"{metas}\n{links}\n{style}\n{extra_scripts}</head>"
+        )
+
+    def analytics(n: int) -> str:
+        return "\n".join(
+            f'<script async src="https://cdn.example.com/t{i}.js"></script>'
+            f'<script>window.dataLayer=window.dataLayer||[];dataLayer.push({{"event":"e{i}","v":"{text(4)}"}});</script>'
+            for i in range(n)
+        )
+
+    def cards(n: int) -> str:
+        return "\n".join(
+            f'<li class="css-5lfssm eu4oa1w0"><div class="cardOutline tapItem"><div class="job_seen_beacon"><table><tbody><tr><td>'
+            f'<h2 class="jobTitle"><a href="/rc/clk?jk={i:016x}"><span title="{text(3)}">{text(3)}</span></a></h2>'
+            f'<div class="company_location"><span data-testid="company-name">{text(2)}</span>'
+            f'<div data-testid="text-location">{text(1)}</div></div>'
+            f'<div class="metadata">{text(4)}</div><ul>'
+            + "".join(f"<li>{text(8)}</li>" for _ in range(3))
+            + "</ul></td></tr></tbody></table></div></div></li>"
+            for i in range(n)
+        )
+
+    def result(i: int) -> dict:
+        return {
+            "jobkey": f"{i:016x}",
+            "displayTitle": text(3).title(),
+            "truncatedCompany": text(2).title(),
+            "jobCountry": "FR",
+            "jobLocationCity": "Paris",
+            "jobLocationState": "Île-de-France",
+            "pubDate": 1714550400000 + i * 3600000,
+            "link": f"/rc/clk?jk={i:016x}&from=serp",
+            "snippet": "<ul><li>" + text(25) + "</li></ul>",
+            "taxonomyAttributes": [{"label": "benefits", "attributes": [{"label": text(2)} for _ in range(3)]}],
+            "rankingScoresModel": {"bid": text.random.randint(0, 9000)},
+            "companyBrandingAttributes": {
+                "logoUrl": f"https://d2q79iu7y748jz.cloudfront.net/s/_squarelogo/{i}.png",
+                "headerImageUrl": f"https://d2q79iu7y748jz.cloudfront.net/s/_headerimage/{i}.png",
+            },
+            "extractedSalary": {"min": 40000, "max": 55000, "type": "yearly"},
+            "formattedRelativeTime": "il y a 3 jours",
+        }
+
+    providers = "\n".join(
+        f'window.mosaic.providerData["mosaic-provider-{name}"]={json.dumps(data, ensure_ascii=False)};'
+        for name, data in [
+            (
+                "jobcards",
+                {
+                    "metaData": {
+                        "mosaicProviderJobCardsModel": {"results": [result(i) for i in range(15)], "tierSummaries": [{"jobCount": 15}]}
+                    }
+                },
+            ),
+            ("rich-media", {"items": [{"id": i, "body": text(30)} for i in range(40)]}),
+            ("serpreportjob", {"reasons": [text(5) for _ in range(20)]}),
+        ]
+    )
+    overview = (
+        head("Emplois : data engineer - Paris (75) | Indeed", analytics(12))
+        + f'<body><div id="mosaic-provider-jobcards"><ul class="css-zu9cdh">{cards(15)}</ul></div><div class="footer">'
+        + "".join(f"<a href='/q-{i}.html'>{text(3)}</a>" for i in range(400))
+        + f'</div>{analytics(6)}<script id="mosaic-data" type="text/javascript">\nwindow.mosaic = window.mosaic || {{}};\n'
+        f"window.mosaic.providerData = window.mosaic.providerData || {{}};\n{providers}\n</script></body></html>"
+    )
+
+    initial = {
+        "hostQueryExecutionResult": {
+            "data": {
+                "jobData": {
+                    "results": [
+                        {
+                            "job": {
+                                "title": text(3),
+                                "description": {"text": text(400), "html": "<p>" + text(400) + "</p>"},
+                                "location": {"latitude": 48.8566, "longitude": 2.3522, "city": "Paris"},
+                                "attributes": [{"label": text(2)} for _ in range(20)],
+                            }
+                        }
+                    ]
+                }
+            }
+        },
+        "jobInfoWrapperModel": {"jobInfoModel": {"sanitizedJobDescription": "<div>" + text(400) + "</div>"}},
+        "i18n": {f"k{i}": text(5) for i in range(800)},
+    }
+    detail = (
+        head("Data engineer H/F - Paris (75) - Indeed.com", analytics(14))
+        + "<body><div id='viewJobSSRRoot'>"
+        + "".join(f"<div class='jobsearch-{i}'><p>{text(20)}</p></div>" for i in range(300))
+        + f"</div>{analytics(8)}<script>window._initialData={json.dumps(initial, ensure_ascii=False)};"
+        "window._sentryData={};</script></body></html>"
+    )
+
+    # Fake keys, in the format of the ones the WTJ scraper reads
+    env = {
+        "ALGOLIA_APPLICATION_ID": "CSEKHVMS53",
+        "ALGOLIA_API_KEY_CLIENT": "4bd8f6215d0cc52b26430765769e65a0",
+        "HERE_API_KEY": "aV0uBHhLk6Tf4rSt9J2pQxYzW8mNcE1dGfHiJkLm",
+        "ENV": "production",
+        "FEATURES": {f"flag_{i}": i % 2 == 0 for i in range(300)},
+        "SENTRY_DSN": "https://public@sentry.example.com/1",
+    }
+    wtj = (
+        head("Welcome to the Jungle - Le guide de l'emploi", "")
+        + f'<body><script type="text/javascript">window.env = {json.dumps(env)}</script><div id="app">'
+        + "".join(
+            f"<article class='sc-{i}'><h3>{text(4)}</h3><p>{text(30)}</p><img src='/img/{i}.jpg' alt='{text(2)}'></article>"
+            for i in range(500)
+        )
+        + f"</div>{analytics(10)}</body></html>"
+    )
+    return {"indeed_overview.html": overview, "indeed_detail.html": detail, "wtj_home.html": wtj}
+
+
+def generate_records() -> dict[str, list[dict]]:
+    """Result records of each source, in the shape the scrapers receive them, with the optional fields some records lack."""
+    text = Text(11)
+    cities = [
+        ("75 - Paris", 48.8566, 2.3522),
+        ("69 - Lyon 3e Arrondissement", 45.76, 4.85),
+        ("33 - Bordeaux", 44.84, -0.58),
+        ("31 - Toulouse", 43.6, 1.44),
+        ("France", None, None),
+    ]
+    salaries = [
+        "Annuel de 40000 Euros à 50000 Euros sur 12 mois",
+        "Mensuel de 2100,50 Euros sur 12 mois",
+        "Horaire de 11,65 Euros",
+        None,
+        "Selon profil",
+    ]
+
+    def france_travail(i: int) -> dict:
+        city, lat, lng = cities[i % len(cities)]
+        salary = salaries[i % len(salaries)]
+        record = {
+            "id": f"17{i:05d}X",
+            "intitule": text(3).title() + " (H/F)",
+            "description": text(120),
+            "dateCreation": f"2024-05-{1 + i % 28:02d}T10:{i % 60:02d}:00.000Z",
+            "dateActualisation": "2024-05-30T08:00:00.000Z",
+            "lieuTravail": {"libelle": city, "codePostal": "75001", "commune": "75101"},
+            "romeCode": "M1805",
+            "romeLibelle": "Études et développement informatique",
+            "appellationlibelle": "Data engineer",
+            "entreprise": {"nom": text(2).title(), "entrepriseAdaptee": False} if i % 4 else {"entrepriseAdaptee": False},
+            "typeContrat": "CDI",
+            "typeContratLibelle": "Contrat à durée indéterminée",
+            "natureContrat": "Contrat travail",
+            "experienceExige": "E",
+            "experienceLibelle": ["2 An(s)", "Débutant accepté", "5 ans"][i % 3],
+            "competences": [{"code": str(k), "libelle": text(4), "exigence": "S"} for k in range(4)],
+            "salaire": {"libelle": salary, "complement1": "Mutuelle", "complement2": "Titres restaurant"} if salary else {},
+            "dureeTravailLibelle": "35H Horaires normaux",
+            "alternance": False,
+            "nombrePostes": 1,
+            "accessibleTH": False,
+            "qualificationCode": "9",
+            "secteurActivite": "62",
+            "secteurActiviteLibelle": "Programmation informatique",
+            "origineOffre": {"origine": "1", "urlOrigine": f"https://candidat.francetravail.fr/offres/recherche/detail/17{i:05d}X"},
+        }
+        if lat:
+            record["lieuTravail"].update({"latitude": lat, "longitude": lng})
+        if i % 7 == 0:
+            record["langues"] = [{"libelle": "Anglais", "exigence": "E"}]
+        return record
+
+    def indeed(i: int) -> dict:
+        return {
+            "jobkey": f"{i:016x}",
+            "displayTitle": text(3).title(),
+            "truncatedCompany": text(2).title(),
+            "jobCountry": "FR",
+            "jobLocationCity": ["Paris", "Lyon", None][i % 3],
+            "jobLocationState": "Île-de-France",
+            "pubDate": 1714550400000 + i * 3600000,
+            "link": f"/rc/clk?jk={i:016x}&from=serp",
+            "snippet": "<ul><li>" + text(25) + "</li></ul>",
+            "taxonomyAttributes": [
+                {"label": "benefits", "attributes": [{"label": text(2)} for _ in range(i % 4)]},
+                {"label": "job-types", "attributes": [{"label": "CDI"}]},
+            ],
+            "rankingScoresModel": {"bid": text.random.randint(0, 9000)},
+            "jobTypes": ["CDI"] if i % 2 else [],
+            "companyBrandingAttributes": {
+                "logoUrl": f"https://d2q79iu7y748jz.cloudfront.net/s/_squarelogo/{i}.png",
+                "headerImageUrl": f"https://d2q79iu7y748jz.cloudfront.net/s/_headerimage/{i}.png",
+            }
+            if i % 3
+            else {},
+            "extractedSalary": {"min": 40000 + i, "max": 55000 + i, "type": "yearly"} if i % 2 else None,
+            "hostQueryExecutionResult": {
+                "data": {
+                    "jobData": {
+                        "results": [{"job": {"description": {"text": text(150)}, "location": {"latitude": 48.85, "longitude": 2.35}}}]
+                    }
+                }
+            }
+            if i % 5
+            else None,
+        }
+
+    def wtj(i: int) -> dict:
+        slug = f"{text(2).replace(' ', '-')}-{i}"
+        return {
+            "name": text(3).title(),
+            "reference": f"{i:08x}",
+            "slug": slug,
+            "published_at": f"2024-05-{1 + i % 28:02d}T10:00:00Z",
+            "language": "fr",
+            "contract_type": "full_time",
+            "benefits": [text(2) for _ in range(i % 3)],
+            "profile": text(80),
+            "remote": ["partial", "no", "fulltime"][i % 3],
+            "has_remote": True,
+            "salary_minimum": 45000 if i % 2 else None,
+            "salary_maximum": 60000 if i % 2 else None,
+            "salary_currency": "EUR",
+            "salary_period": "yearly",
+            "organization": {
+                "name": text(2).title(),
+                "slug": f"org-{i % 40}",
+                "nb_employees": 120,
+                "description": text(40),
+                "logo": {"url": f"https://cdn.wttj.co/{i}.png"},
+            },
+            "offices": [{"country": "France", "local_city": "Paris", "local_state": "Île-de-France"}],
+            "_geoloc": [{"lat": 48.87, "lng": 2.33}],
+            "new_profession": {"category_name": "Tech", "sub_category_name": "Data", "sub_category_reference": "data-engineer"},
+            "sectors": [{"name": "SaaS"}],
+            "objectID": f"{i:08x}",
+        }
+
+    # Records are generated source after source, the order the seeded words are drawn in
+    return {
+        "france_travail_records.json": [france_travail(i) for i in range(149)],
+        "indeed_records.json": [indeed(i) for i in range(150)],
+        "wtj_records.json": [wtj(i) for i in range(150)],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    FIXTURES.mkdir(exist_ok=True)
+    for name, content in generate_pages().items():
+        (FIXTURES / name).write_text(content)
+        print(f"{name:<32}{len(content):>10}")
+    for name, records in generate_records().items():
+        with open(FIXTURES / name, "w") as f:
+            json.dump(records, f, ensure_ascii=False, indent=1)
+        print(f"{name:<32}{len(records):>10} records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmarks the parsing pipeline of every source offline, on the synthetic result records of benchmarks/fixtures.
+The records are generated by benchmarks.generate_fixtures, the numbers compare implementations with each other on them.
+
+    poetry run python -m benchmarks.parsing                  # compare with benchmarks/baseline.json
+    poetry run python -m benchmarks.parsing --save-baseline  # record the current numbers as the new baseline
+
+For each source and stage it reports records/sec (best of --repeat samples, each lasting at least --min-time seconds),
+the memory blocks still allocated after the stage and its peak traced memory. A stage is flagged as a regression when its
+throughput drops by more than --tolerance, or its peak memory grows by more than --memory-tolerance, compared to the baseline
+in --attempts measurements in a row, and the command then exits with status 1.
+Throughput depends on the machine, record the baseline on the machine the comparison runs on.
+"""
+
+import argparse
+import copy
+import gc
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from aiden_recommender.scrapers.abstract_parser import AbstractParser, job_offers_adapter
+from aiden_recommender.scrapers.france_travail.parser import FranceTravailParser
+from aiden_recommender.scrapers.indeed.parser import IndeedParser
+from aiden_recommender.scrapers.wtj.parser import WtjParser
+
+FIXTURES = Path(__file__).parent / "fixtures"
+BASELINE = Path(__file__).parent / "baseline.json"
+
+PARSERS: dict[str, AbstractParser] = {
+    "france_travail": FranceTravailParser(),
+    "indeed": IndeedParser(),
+    "wtj": WtjParser(),
+}
+
+
+def extract(parser: AbstractParser, records: list[dict]) -> list[dict]:
+    # The field extraction of parse_batch, without the validation
+    for extractor in parser.extraction_plan():
+        for record, value in zip(records, extractor.extract_column(records)):
+            extractor.assign(record, value)
+    return records
+
+
+def stages(parser: AbstractParser, records: list[dict]) -> dict[str, tuple[Callable[[], Any], Callable[[Any], Any]]]:
+    """Stage name -> (setup building a fresh input, stage run on that input). Only the stage is measured."""
+    extracted = extract(parser, copy.deepcopy(records))
+    job_offers = list(parser.parse_batch(copy.deepcopy(records)))
+    return {
+        "parse": (lambda: copy.deepcopy(records), lambda data: list(parser.parse_batch(data))),
+        "extract": (lambda: copy.deepcopy(records), lambda data: extract(parser, data)),
+        "validate": (lambda: extracted, lambda data: job_offers_adapter.validate_python(data)),
+        "model_dump": (lambda: job_offers, lambda data: [job_offer.model_dump() for job_offer in data]),
+        "metadata_repr": (lambda: job_offers, lambda data: [job_offer.metadata_repr() for job_offer in data]),
+    }
+
+
+def time_stage(setup: Callable[[], Any], stage: Callable[[Any], Any], repeat: int, min_time: float) -> float:
+    """Best time of one run of the stage, out of repeat samples each running it on enough inputs to last min_time."""
+    # Like timeit.autorange, a stage lasting a fraction of a millisecond is timed over several runs, a single one is mostly noise
+    loops = 1
+    while True:
+        inputs = [setup() for _ in range(loops)]
+        start = time.perf_counter()
+        for data in inputs:
+            stage(data)
+        if time.perf_counter() - start >= min_time or loops >= 1000:
+            break
+        loops *= 2
+    best = float("inf")
+    gc.collect()
+    for _ in range(repeat):
+        inputs = [setup() for _ in range(loops)]
+        # Like timeit, collections triggered by the setup allocations must not land in the measured stage
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for data in inputs:
+                stage(data)
+            best = min(best, (time.perf_counter() - start) / loops)
+        finally:
+            gc.enable()
+    return best
+
+
+def measure(setup: Callable[[], Any], stage: Callable[[Any], Any], num_records: int, repeat: int, min_time: float) -> dict[str, float]:
+    best = time_stage(setup, stage, repeat, min_time)
+
+    # Memory is traced in a separate run, tracing slows the stage down too much to time it
+    data = setup()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    result = stage(data)
+    peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+    return {
+        "records_per_sec": round(num_records / best, 1),
+        "allocated_blocks": allocated_blocks,
+        "peak_memory_kb": round(peak_memory / 1024, 1),
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float, memory_tolerance: float) -> dict[tuple[str, str], str]:
+    found = {}
+    for source, source_results in results.items():
+        for stage, metrics in source_results.items():
+            if (reference := baseline.get(source, {}).get(stage)) is None:
+                continue
+            if metrics["records_per_sec"] < reference["records_per_sec"] * (1 - tolerance):
+                found[source, stage] = f"{metrics['records_per_sec']} records/sec, baseline {reference['records_per_sec']}"
+            if metrics["peak_memory_kb"] > reference["peak_memory_kb"] * (1 + memory_tolerance):
+                found[source, stage] = f"{metrics['peak_memory_kb']}kB peak memory, baseline {reference['peak_memory_kb']}"
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--min-time", type=float, default=0.02, help="Seconds each timed sample lasts at least")
+    # Throughput of a shared or throttled machine varies by more than a third between two runs, memory doesn't
+    parser.add_argument("--tolerance", type=float, default=0.4, help="Throughput drop flagged as a regression")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="Peak memory growth flagged as a regression")
+    parser.add_argument("--attempts", type=int, default=3, help="Measurements of a stage before it is reported as a regression")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    all_stages = {}
+    print(f"{'source':<16}{'stage':<15}{'records':>8}{'records/sec':>14}{'blocks':>10}{'peak (kB)':>11}")
+    for source, source_parser in PARSERS.items():
+        records = json.loads((FIXTURES / f"{source}_records.json").read_text())
+        results[source] = {}
+        for stage, (setup, run) in stages(source_parser, records).items():
+            all_stages[source, stage] = (setup, run, len(records))
+            metrics = measure(setup, run, len(records), args.repeat, args.min_time)
+            results[source][stage] = metrics
+            print(
+                f"{source:<16}{stage:<15}{len(records):>8}{metrics['records_per_sec']:>14.0f}"
+                f"{metrics['allocated_blocks']:>10}{metrics['peak_memory_kb']:>11.1f}"
+            )
+
+    if args.save_baseline:
+        BASELINE.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline saved to {BASELINE}")
+        return
+    if not BASELINE.exists():
+        print("No baseline to compare with, run with --save-baseline first")
+        return
+    baseline = json.loads(BASELINE.read_text())
+    found = regressions(results, baseline, args.tolerance, args.memory_tolerance)
+    for _ in range(args.attempts - 1):
+        if not found:
+            break
+        # A stage slowed down by a busy machine is measured again, its best measurement is the one compared
+        for source, stage in found:
+            setup, run, num_records = all_stages[source, stage]
+            metrics = measure(setup, run, num_records, args.repeat, args.min_time)
+            previous = results[source][stage]
+            metrics["records_per_sec"] = max(metrics["records_per_sec"], previous["records_per_sec"])
+            metrics["peak_memory_kb"] = min(metrics["peak_memory_kb"], previous["peak_memory_kb"])
+            results[source][stage] = metrics
+        found = regressions(results, baseline, args.tolerance, args.memory_tolerance)
+    if found:
+        print("Regressions:\n" + "\n".join(f"  {source}/{stage}: {regression}" for (source, stage), regression in found.items()))
+        raise SystemExit(1)
+    print("No regression against the baseline")
+
+
+if __name__ == "__main__":
+    main()
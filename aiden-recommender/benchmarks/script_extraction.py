@@ -0,0 +1,54 @@
+"""
+Compares the fast script extraction of the Indeed and WTJ scrapers with the full BeautifulSoup path on generated pages.
+
+    poetry run python -m benchmarks.script_extraction --repeat 20
+
+Each fixture is a synthetic page of benchmarks.generate_fixtures, the size of a browser rendered page, with the script the scrapers
+look for. Its markup is not the markup of the real sites, the timings compare the two paths with each other.
+Both paths must return the same script, the benchmark fails otherwise.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from aiden_recommender.scrapers.script_extraction import find_script, find_script_in_soup
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# fixture -> arguments of the lookup done by the scraper parsing that page
+PAGES: dict[str, tuple[dict[str, str], Optional[str]]] = {
+    "indeed_overview.html": ({"id": "mosaic-data"}, None),
+    "indeed_detail.html": ({}, "window._initialData="),
+    "wtj_home.html": ({"type": "text/javascript"}, None),
+}
+
+
+def timed(func: Callable[[], Optional[str]], repeat: int) -> tuple[float, Optional[str]]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'page':<22}{'size':>10}{'soup (ms)':>12}{'fast (ms)':>12}{'speedup':>10}")
+    for fixture, (attrs, containing) in PAGES.items():
+        html = (FIXTURES / fixture).read_text()
+        soup_time, soup_script = timed(lambda: find_script_in_soup(html, attrs, containing), args.repeat)
+        fast_time, fast_script = timed(lambda: find_script(html, attrs, containing), args.repeat)
+        if fast_script is None or fast_script != soup_script:
+            raise SystemExit(f"{fixture}: the fast path doesn't return the script found by BeautifulSoup")
+        print(f"{fixture:<22}{len(html):>10}{soup_time * 1000:>12.2f}{fast_time * 1000:>12.3f}{soup_time / fast_time:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Measures how long the recommender and the web app take to import, each in a fresh interpreter, with every service unreachable.
+
+    poetry run python -m benchmarks.startup --repeat 5
+    poetry run python -m benchmarks.startup --web-python ../aiden-web/.venv/bin/python
+
+Clients are created on first use and collections by the startup hooks, so importing either app must neither connect
+to Qdrant, Redis, Mistral or Zyte nor need their credentials. An import that fails in these conditions fails the benchmark.
+The web app is imported with the interpreter given by --web-python, the one of its own environment.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+
+# Nothing listens on the discard port, any connection attempt at import fails instead of hanging
+UNREACHABLE_ENV = {
+    "QDRANT_URL": "http://127.0.0.1:9",
+    "REDIS_URL": "redis://127.0.0.1:9",
+    "DJANGO_SETTINGS_MODULE": "aiden_project.settings",
+}
+
+# service -> (directory the service runs from, statements importing it)
+SERVICES = {
+    "recommender": (ROOT / "aiden-recommender", "import aiden_recommender.main"),
+    "web": (ROOT / "aiden-web", "import django; django.setup(); import aiden_app.urls"),
+}
+
+TIMED_IMPORT = "import time; start = time.perf_counter(); {statements}; print(time.perf_counter() - start)"
+
+
+def import_time(python: str, directory: Path, statements: str) -> float:
+    # Only the env needed to find the interpreter, the credentials of the services are left out on purpose
+    env = {"PATH": os.environ.get("PATH", ""), "HOME": os.environ.get("HOME", ""), **UNREACHABLE_ENV}
+    result = subprocess.run(
+        [python, "-W", "ignore", "-c", TIMED_IMPORT.format(statements=statements)],
+        cwd=directory,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Import failed in {directory.name}:\n{result.stderr}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--recommender-python", default=sys.executable)
+    parser.add_argument("--web-python", default=sys.executable)
+    parser.add_argument("--services", nargs="+", choices=list(SERVICES), default=list(SERVICES))
+    args = parser.parse_args()
+
+    interpreters = {"recommender": args.recommender_python, "web": args.web_python}
+    print(f"{'service':<14}{'min (s)':>10}{'median (s)':>12}{'max (s)':>10}")
+    for service in args.services:
+        directory, statements = SERVICES[service]
+        times = [import_time(interpreters[service], directory, statements) for _ in range(args.repeat)]
+        print(f"{service:<14}{min(times):>10.3f}{statistics.median(times):>12.3f}{max(times):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import timedelta
+
+from pydantic import BaseModel
+
+from aiden_recommender.scrapers import utils
+
+
+class Result(BaseModel):
+    value: str
+
+
+class Redis:
+    def __init__(self):
+        self.values: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def setex(self, key, retention_period, value):
+        self.values[key] = value
+
+
+def test_async_cache_keys_every_argument(monkeypatch):
+    monkeypatch.setattr(utils, "async_redis_client", Redis())
+    calls = []
+
+    @utils.cache(retention_period=timedelta(days=1), model=Result)
+    async def lookup(reference: str, language: str = "fr") -> Result:
+        calls.append((reference, language))
+        return Result(value=f"{reference}-{language}")
+
+    async def run():
+        # The first argument is part of the key, two references never share a cached result
+        assert (await lookup("a")).value == "a-fr"
+        assert (await lookup("b")).value == "b-fr"
+        assert (await lookup("b", "en")).value == "b-en"
+        # Positional, keyword and default arguments map to the same key
+        assert (await lookup(reference="a", language="fr")).value == "a-fr"
+
+    asyncio.run(run())
+    assert calls == [("a", "fr"), ("b", "fr"), ("b", "en")]
+
+
+def test_methods_are_cached_by_argument_not_by_instance(monkeypatch):
+    monkeypatch.setattr(utils, "async_redis_client", Redis())
+    calls = []
+
+    class Finder:
+        @utils.cache(retention_period=timedelta(days=1), model=Result)
+        async def find(self, reference: str) -> Result:
+            calls.append(reference)
+            return Result(value=reference)
+
+    async def run():
+        assert (await Finder().find("a")).value == "a"
+        assert (await Finder().find("a")).value == "a"
+        assert (await Finder().find("b")).value == "b"
+
+    asyncio.run(run())
+    assert calls == ["a", "b"]
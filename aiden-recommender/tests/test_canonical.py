@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from aiden_recommender.canonical import Gazetteer, canonical_location, location_key
+from aiden_recommender.query_cache import SemanticQueryCache
+from aiden_recommender.scrapers.pagination import PaginationCursors
+
+
+def test_spelling_variants_share_the_place_id():
+    variants = ["Paris", "paris ", "Paris, France", "75011 Paris", "Paris 11e"]
+    assert {location_key(variant) for variant in variants} == {location_key("Paris")}
+    assert location_key("Paris") != canonical_location("Paris")
+    # Keys built from the name the scrapers receive are the ones of the raw location
+    assert location_key(canonical_location("St Etienne")) == location_key("saint-étienne")
+
+
+def test_unknown_locations_are_folded():
+    assert location_key("  Trifouilly-les-Oies ") == "trifouilly-les-oies"
+
+
+def test_cache_and_cursor_keys_use_the_place_id():
+    place_id = location_key("Paris")
+    assert SemanticQueryCache._key("Paris, France").endswith(place_id)
+    assert PaginationCursors._key("wtj", "data engineer", "75011 Paris") == f"crawl-cursor-wtj-data engineer-{place_id}"
+
+
+def test_places_sharing_a_name_are_rejected(tmp_path):
+    path = tmp_path / "gazetteer.json"
+    entries = [{"id": f"fr-city:{code}", "name": "Saint-Denis", "kind": "city", "lat": 0.0, "lng": 0.0} for code in ("93066", "97411")]
+    path.write_text(json.dumps(entries))
+    with pytest.raises(ValueError):
+        Gazetteer(path).places
+
+
+def test_aliases_never_shadow_names(tmp_path):
+    path = tmp_path / "gazetteer.json"
+    entries = [
+        {"id": "a", "name": "Alpha", "kind": "city", "lat": 0.0, "lng": 0.0, "aliases": ["beta"]},
+        {"id": "b", "name": "Beta", "kind": "city", "lat": 0.0, "lng": 0.0},
+    ]
+    path.write_text(json.dumps(entries))
+    assert Gazetteer(path).find("Beta").id == "b"
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from aiden_recommender import query_cache
+from aiden_recommender.query_cache import SemanticQueryCache, query_terms
+
+
+def test_paraphrases_share_their_terms():
+    assert query_terms("Python dev in Lyon") == query_terms("python developer lyon")
+    assert query_terms("Développeur Python H/F") == query_terms("python developers")
+    assert query_terms("ingénieur data") == query_terms("data engineers")
+    assert query_terms("node.js dev") == {"node.js", "developer"}
+
+
+def test_different_jobs_do_not():
+    assert query_terms("java developer") != query_terms("python developer")
+    assert query_terms("c++ developer") != query_terms("c# developer")
+    assert query_terms("data engineer") != query_terms("data scientist")
+
+
+class Redis:
+    def __init__(self, crawled_at: dict[str, float]):
+        self.crawled_at = crawled_at
+
+    async def hgetall(self, key):
+        return {query.encode(): str(at).encode() for query, at in self.crawled_at.items()}
+
+
+class EmbeddingStore:
+    """Embeds every text alike, the closest any two texts can be."""
+
+    def __init__(self):
+        self.texts: list[str] = []
+
+    async def aembed(self, texts, slot=None):
+        self.texts.extend(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+
+def test_only_queries_about_the_same_terms_are_reused(monkeypatch):
+    embedding_store = EmbeddingStore()
+    monkeypatch.setattr(query_cache, "async_redis_client", Redis({"python developer": time.time()}))
+    monkeypatch.setattr(query_cache, "embedding_store", embedding_store)
+    cache = SemanticQueryCache()
+
+    async def run():
+        assert await cache.resolve("python dev in", "Lyon") == "python developer"
+        # Same embedding, different job: crawled under its own query, without embedding anything
+        embedding_store.texts.clear()
+        assert await cache.resolve("java developer", "Lyon") == "java developer"
+        assert embedding_store.texts == []
+
+    asyncio.run(run())
+    assert cache.stats()["near_duplicate_hits"] == 1
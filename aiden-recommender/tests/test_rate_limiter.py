@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from aiden_recommender.rate_limiter import UpstreamLimiter, is_throttling_error
+
+
+class UpstreamError(Exception):
+    def __init__(self, status: int):
+        self.status = status
+
+
+def limiter(**kwargs) -> UpstreamLimiter:
+    params = {"name": "test", "rate": 1000, "burst": 1000, "max_concurrency": 8, "min_concurrency": 2, "target_latency": 1.0}
+    return UpstreamLimiter(**{**params, **kwargs})
+
+
+def test_starts_at_min_concurrency_unless_configured():
+    assert limiter().concurrency_limit == 2
+    assert limiter(initial_concurrency=5).concurrency_limit == 5
+    assert limiter(initial_concurrency=20).concurrency_limit == 8
+    assert limiter(initial_concurrency=0).concurrency_limit == 2
+
+
+def test_initial_concurrency_from_env(monkeypatch):
+    monkeypatch.setenv("TEST_INITIAL_CONCURRENCY", "6")
+    assert UpstreamLimiter.from_env("test", rate=1, burst=1, max_concurrency=8).concurrency_limit == 6
+    monkeypatch.delenv("TEST_INITIAL_CONCURRENCY")
+    assert UpstreamLimiter.from_env("test", rate=1, burst=1, max_concurrency=8, min_concurrency=3).concurrency_limit == 3
+
+
+def test_additive_increase_up_to_max_concurrency():
+    upstream = limiter(min_concurrency=4)
+    upstream.record(0.1)
+    assert upstream.concurrency_limit == pytest.approx(4.25)
+    # About one more slot per window of concurrency_limit successful calls
+    for _ in range(3):
+        upstream.record(0.1)
+    assert 4.9 < upstream.concurrency_limit < 5
+    for _ in range(100):
+        upstream.record(0.1)
+    assert upstream.concurrency_limit == 8
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_multiplicative_decrease_on_throttling_and_server_errors(status):
+    upstream = limiter(initial_concurrency=8)
+
+    async def call():
+        async with upstream.slot():
+            raise UpstreamError(status)
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(call())
+    assert upstream.concurrency_limit == 4
+    assert upstream.throttled_calls == 1
+    assert upstream.in_flight == 0
+
+
+def test_client_errors_do_not_decrease():
+    upstream = limiter(initial_concurrency=8)
+
+    async def call():
+        async with upstream.slot():
+            raise UpstreamError(404)
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(call())
+    assert upstream.concurrency_limit == 8
+    assert not is_throttling_error(ValueError())
+    assert is_throttling_error(TimeoutError())
+
+
+def test_decrease_once_per_target_latency_down_to_min_concurrency():
+    upstream = limiter(initial_concurrency=8)
+    upstream.record(0.1, throttled=True)
+    # Calls in flight during the same congestion don't decrease it again
+    upstream.record(0.1, throttled=True)
+    assert upstream.concurrency_limit == 4
+    for _ in range(5):
+        upstream.last_decrease_at = 0.0
+        upstream.record(2.0)
+    assert upstream.concurrency_limit == 2
+    assert upstream.slow_calls == 5
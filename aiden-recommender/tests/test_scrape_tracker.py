@@ -0,0 +1,76 @@
+import asyncio
+from uuid import uuid4
+
+from aiden_recommender.models import ZyteRequest
+from aiden_recommender.scrapers import scrape_tracker
+from aiden_recommender.scrapers.scrape_tracker import RedisScrapeTracker, ScrapeTracker
+
+
+class Redis:
+    """The commands of the tracker read by wait and failed, on keys set by the tests."""
+
+    def __init__(self):
+        self.values: dict[str, int] = {}
+
+    def register_script(self, script):
+        return None
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+
+class Progress:
+    def increment(self, scrape_ids, field, amount=1) -> None:
+        pass
+
+
+def test_failed_request_fails_its_scrape_once_done():
+    async def run():
+        tracker = ScrapeTracker(Progress())  # type: ignore[arg-type]
+        failing, other = uuid4(), uuid4()
+        for scrape_id in (failing, other):
+            await tracker.open(scrape_id)
+        request = ZyteRequest(query={"url": "https://example.com"}, scrape_ids={failing})
+        await tracker.add(request)
+        await tracker.release(failing)
+        await tracker.release(other)
+        await tracker.fail(request)
+        await tracker.done(request)
+        # The scrape finishes, but as failed, so that its windows are not reported as crawled
+        assert await tracker.wait(failing, timeout=1)
+        assert await tracker.failed(failing)
+        assert not await tracker.failed(other)
+        await tracker.close(failing)
+        assert not await tracker.failed(failing)
+
+    asyncio.run(run())
+
+
+def test_failures_of_closed_scrapes_are_ignored():
+    async def run():
+        tracker = ScrapeTracker(Progress())  # type: ignore[arg-type]
+        scrape_id = uuid4()
+        await tracker.fail(ZyteRequest(query={"url": "https://example.com"}, scrape_ids={scrape_id}))
+        assert not await tracker.failed(scrape_id)
+
+    asyncio.run(run())
+
+
+def test_lost_redis_counter_is_neither_finished_nor_complete(monkeypatch):
+    redis = Redis()
+    monkeypatch.setattr(scrape_tracker, "async_redis_client", redis)
+
+    async def run():
+        tracker = RedisScrapeTracker(Progress(), poll_interval=0.01)  # type: ignore[arg-type]
+        finished, lost = uuid4(), uuid4()
+        redis.values[tracker._key(finished)] = 0
+        assert await tracker.wait(finished, timeout=1)
+        assert not await tracker.failed(finished)
+        # The counter and the failure flag of lost expired or were evicted while its requests were in flight
+        assert not await tracker.wait(lost, timeout=1)
+        assert await tracker.failed(lost)
+
+    asyncio.run(run())
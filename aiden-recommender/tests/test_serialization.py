@@ -0,0 +1,55 @@
+import json
+
+import pytest
+from mistralai.models.embeddings import EmbeddingObject
+
+from aiden_recommender.models import MistralEmbeddingRequest, QdrantRequest, ZyteRequest
+from aiden_recommender.scrapers import wtj_scraper
+from aiden_recommender.scrapers.embedding_batcher import EmbeddingBatcher
+from aiden_recommender.serialization import dumps, loads
+
+
+def test_requests_round_trip():
+    request = wtj_scraper.get_zyte_request("https://example.com", callback=wtj_scraper.parse_algolia_resuts, meta={"page": 1})
+    loaded = loads(dumps(request))
+    assert isinstance(loaded, ZyteRequest)
+    assert loaded.query == request.query
+    assert loaded.callback.func == wtj_scraper.parse_zyte_response
+    assert loaded.callback.keywords == {"parser_func": wtj_scraper.parse_algolia_resuts, "meta": {"page": 1}}
+
+    embeddings = [EmbeddingObject(object="embedding", embedding=[0.5], index=0)]
+    loaded = loads(dumps(QdrantRequest(embeddings=embeddings, job_offers=[])))
+    assert loaded.embeddings == embeddings
+
+
+def test_registered_functions_round_trip():
+    batched = MistralEmbeddingRequest(input=[], callback=EmbeddingBatcher._dispatch)
+    assert loads(dumps(batched)).callback is EmbeddingBatcher._dispatch
+
+
+def unregistered(response):
+    return []
+
+
+def test_unregistered_functions_are_not_encoded():
+    with pytest.raises(TypeError):
+        dumps(ZyteRequest(query={}, callback=unregistered))
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"__function__": "aiden_recommender.tools:os.system"},
+        {"__function__": "os:system"},
+        {"__model__": "aiden_recommender.tools:os.system", "fields": {}},
+        {"__model__": "aiden_recommender.models:ZyteRequest.__class__", "fields": {}},
+        {"__model__": "os:PathLike", "fields": {}},
+        # Defined elsewhere, only imported by the module
+        {"__model__": "aiden_recommender.models:BaseModel", "fields": {}},
+        {"__method__": ["wtj_scraper", "__init__"]},
+        {"__method__": ["wtj_scraper", "parser"]},
+    ],
+)
+def test_arbitrary_objects_are_refused(value):
+    with pytest.raises(ValueError):
+        loads(json.dumps(value))
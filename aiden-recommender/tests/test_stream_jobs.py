@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from aiden_shared.models import JobOffer
+from aiden_recommender.scrapers import scraper_aggregator
+from aiden_recommender.scrapers.scraper_aggregator import ScraperAggregator
+
+
+def offer(reference: str) -> JobOffer:
+    return JobOffer(
+        benefits=[],
+        language="fr",
+        name=reference,
+        offices=[],
+        organization={"name": "ACME"},
+        published_at="2024-05-01T00:00:00Z",
+        source="test",
+        reference=reference,
+    )
+
+
+class Qdrant:
+    async def search(self, **kwargs):
+        return []
+
+
+def test_offers_are_pushed_as_they_are_ingested(monkeypatch):
+    monkeypatch.setattr(scraper_aggregator, "async_qdrant_client", Qdrant())
+    aggregator = ScraperAggregator()
+
+    async def search_vector(*args):
+        return [1.0, 0.0]
+
+    async def scrape(scrape_id, *args):
+        await asyncio.sleep(0.05)
+        # Ingested together, pushed best first
+        for reference, vector in [("far", [0.0, 1.0]), ("close", [1.0, 0.1])]:
+            for queue in aggregator.result_stream.subscribers[scrape_id]:
+                queue.put_nowait((offer(reference), vector))
+        await asyncio.sleep(1)
+        await aggregator.result_stream.close(scrape_id)
+
+    monkeypatch.setattr(aggregator, "_get_search_vector", search_vector)
+    monkeypatch.setattr(aggregator, "scrape", scrape)
+
+    async def run():
+        start = time.monotonic()
+        pushed = []
+        async for ranked in aggregator.stream_jobs("data engineer", "Paris", None, num_results=2):
+            pushed.append((ranked.job_offer.reference, time.monotonic() - start))
+        return pushed
+
+    pushed = asyncio.run(run())
+    assert [reference for reference, _ in pushed] == ["close", "far"]
+    # Both are pushed long before the end of the scrape
+    assert all(elapsed < 0.5 for _, elapsed in pushed)
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from qdrant_client.models import PointStruct
+
+from aiden_recommender import upsert_buffer
+from aiden_recommender.upsert_buffer import QdrantUpsertBuffer
+
+
+class FakeQdrant:
+    def __init__(self):
+        self.batches: list[list[PointStruct]] = []
+
+    async def upsert(self, collection_name: str, points: list[PointStruct]) -> None:
+        self.batches.append(points)
+
+
+def point(i: int) -> PointStruct:
+    return PointStruct(id=i, vector=[0.0, 1.0], payload={})
+
+
+def test_size_flush_triggers_before_the_timer(monkeypatch):
+    qdrant = FakeQdrant()
+    monkeypatch.setattr(upsert_buffer, "async_qdrant_client", qdrant)
+    # The timer is far beyond the test, only the size flush can release the workers
+    buffer = QdrantUpsertBuffer("jobs", max_points=8, max_wait=60)
+
+    async def run():
+        await asyncio.gather(*[buffer.upsert([point(i)]) for i in range(16)])
+
+    start = time.perf_counter()
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert time.perf_counter() - start < 1
+    assert [len(batch) for batch in qdrant.batches] == [8, 8]
+    assert buffer.stats()["points_flushed"] == 16
+
+
+def test_timer_flushes_a_partial_batch(monkeypatch):
+    qdrant = FakeQdrant()
+    monkeypatch.setattr(upsert_buffer, "async_qdrant_client", qdrant)
+    buffer = QdrantUpsertBuffer("jobs", max_points=8, max_wait=0.01)
+
+    async def run():
+        await asyncio.gather(*[buffer.upsert([point(i)]) for i in range(3)])
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert [len(batch) for batch in qdrant.batches] == [3]
+
+
+def test_default_batch_fits_under_the_workers():
+    from aiden_recommender.scrapers.scraper_aggregator import ScraperAggregator
+
+    assert upsert_buffer.qdrant_upsert_buffer.max_points < ScraperAggregator().workers
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+from zyte_api import RequestError
+
+from aiden_recommender import zyte_client
+from aiden_recommender.rate_limiter import UpstreamLimiter
+from aiden_recommender.zyte_client import BoundedRetryFactory, ZyteClient
+
+
+def request_error(status: int) -> RequestError:
+    return RequestError(request_info=None, history=(), status=status, message="", headers={}, response_content=b"", query={})
+
+
+def test_network_and_download_errors_are_retried_briefly():
+    attempts = 0
+
+    async def call():
+        nonlocal attempts
+        attempts += 1
+        raise request_error(520)
+
+    start = time.monotonic()
+    with pytest.raises(RequestError):
+        asyncio.run(BoundedRetryFactory(max_attempts=2).build()(call))
+    # The default policy waits up to a minute between attempts
+    assert attempts == 2
+    assert time.monotonic() - start < 2
+
+
+def test_throttling_is_raised_on_the_first_attempt():
+    attempts = 0
+
+    async def call():
+        nonlocal attempts
+        attempts += 1
+        raise request_error(429)
+
+    with pytest.raises(RequestError):
+        asyncio.run(BoundedRetryFactory(max_attempts=4).build()(call))
+    assert attempts == 1
+
+
+class Api:
+    def __init__(self, statuses: list[int]):
+        self.statuses = statuses
+        self.limits: list[int] = []
+
+    async def get(self, query, session):
+        self.limits.append(int(zyte_client.limiters["zyte"].concurrency_limit))
+        if status := self.statuses.pop(0):
+            raise request_error(status)
+        return {"url": query["url"]}
+
+
+def test_throttled_calls_back_off_the_limiter_and_are_retried_through_it(monkeypatch):
+    limiter = UpstreamLimiter("zyte", rate=1000, burst=1000, max_concurrency=16, min_concurrency=2, initial_concurrency=16)
+    monkeypatch.setitem(zyte_client.limiters, "zyte", limiter)
+    monkeypatch.setattr(zyte_client.random, "uniform", lambda a, b: 0)
+    client = ZyteClient(api_key="key", max_attempts=3)
+    client.client = Api([429, 0])  # type: ignore[assignment]
+
+    async def run():
+        try:
+            return await client.get({"url": "https://example.com"})
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) == {"url": "https://example.com"}
+    # The first 429 halves the concurrency before the retry
+    assert client.client.limits == [16, 8]  # type: ignore[attr-defined]
+    assert limiter.throttled_calls == 1
+
+    client.client = Api([429, 429, 429, 429])  # type: ignore[assignment]
+    with pytest.raises(RequestError):
+        asyncio.run(run())
+    assert len(client.client.limits) == 3  # type: ignore[attr-defined]
@@ -1,3 +1,5 @@
 JOB_COLLECTION = "jobs"
+USER_COLLECTION = "user_profile"
 COMPANY_COLLECTION = "companies"
 ISO_8601 = "%Y-%m-%dT%H:%M:%SZ"
+EMBEDDING_MODEL = "mistral-embed"
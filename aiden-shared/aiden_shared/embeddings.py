@@ -0,0 +1,87 @@
+import hashlib
+from array import array
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import AsyncContextManager, Callable, Optional
+
+from .constants import EMBEDDING_MODEL
+from .tools import async_embedding_redis_client, async_mistral_client, embedding_redis_client, mistral_client
+
+
+class EmbeddingStore:
+    """
+    Content addressed store of embedding vectors, keyed by a hash of the embedded text and of the model name.
+    Identical texts (reposted or cross-listed offers, repeated search queries...) are only embedded once.
+    Vectors are stored in the embedding Redis, whose memory budget is enforced by LRU eviction: an evicted vector is embedded again.
+    """
+
+    def __init__(self, model: str = EMBEDDING_MODEL, retention_period: timedelta = timedelta(days=365)):
+        self.model = model
+        self.retention_period = retention_period
+
+    def _key(self, text: str) -> str:
+        return "embedding-" + hashlib.sha256(f"{self.model}\n{text}".encode()).hexdigest()
+
+    @staticmethod
+    def _encode(vector: list[float]) -> bytes:
+        # Vectors are stored as packed float32, the precision used by Qdrant, to keep them compact in Redis
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _decode(value: Optional[bytes]) -> Optional[list[float]]:
+        if value is None:
+            return None
+        vector = array("f")
+        vector.frombytes(value)
+        return vector.tolist()
+
+    def get_many(self, texts: list[str]) -> list[Optional[list[float]]]:
+        if not texts:
+            return []
+        return [self._decode(value) for value in embedding_redis_client.mget([self._key(text) for text in texts])]
+
+    async def aget_many(self, texts: list[str]) -> list[Optional[list[float]]]:
+        if not texts:
+            return []
+        return [self._decode(value) for value in await async_embedding_redis_client.mget([self._key(text) for text in texts])]
+
+    def set_many(self, vectors: dict[str, list[float]]) -> None:
+        with embedding_redis_client.pipeline(transaction=False) as pipe:
+            for text, vector in vectors.items():
+                pipe.setex(self._key(text), self.retention_period, self._encode(vector))
+            pipe.execute()
+
+    async def aset_many(self, vectors: dict[str, list[float]]) -> None:
+        async with async_embedding_redis_client.pipeline(transaction=False) as pipe:
+            for text, vector in vectors.items():
+                pipe.setex(self._key(text), self.retention_period, self._encode(vector))
+            await pipe.execute()
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Returns the vector of each text, only the texts missing from the store are sent to Mistral."""
+        vectors = self.get_many(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            response = mistral_client.embeddings(model=self.model, input=missing)
+            new_vectors = {missing[embedding.index]: embedding.embedding for embedding in response.data}
+            self.set_many(new_vectors)
+            vectors = [vector if vector is not None else new_vectors[text] for text, vector in zip(texts, vectors)]
+        return vectors
+
+    async def aembed(self, texts: list[str], slot: Callable[[], AsyncContextManager] = nullcontext) -> list[list[float]]:
+        """
+        Returns the vector of each text, only the texts missing from the store are sent to Mistral.
+        The Mistral call, and only it, runs within slot(), e.g. the slot of a rate limiter.
+        """
+        vectors = await self.aget_many(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            async with slot():
+                response = await async_mistral_client.embeddings(model=self.model, input=missing)
+            new_vectors = {missing[embedding.index]: embedding.embedding for embedding in response.data}
+            await self.aset_many(new_vectors)
+            vectors = [vector if vector is not None else new_vectors[text] for text, vector in zip(texts, vectors)]
+        return vectors
+
+
+embedding_store = EmbeddingStore()
@@ -125,3 +125,8 @@ class JobOffer(BaseModel):
             return f"The profile sought for this position is: '{self.profile}'."
         else:
             return "No specific profile requirements mentioned."
+
+
+class RankedJobOffer(BaseModel):
+    score: float
+    job_offer: JobOffer
@@ -1,4 +1,6 @@
 import os
+import threading
+from typing import Callable, Generic, TypeVar
 
 import redis
 from mistralai.async_client import MistralAsyncClient
@@ -7,27 +9,80 @@ from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.models import Distance, VectorParams
 from redis.asyncio import Redis
-from .constants import JOB_COLLECTION
+from .constants import JOB_COLLECTION  # noqa: F401, imported from here by the services
 
+T = TypeVar("T")
 
-if (qdrant_url := os.getenv("QDRANT_URL")) is None:
-    raise Exception("QDRANT_URL env variable is not set")
-qdrant_client = QdrantClient(url=qdrant_url)
-async_qdrant_client = AsyncQdrantClient(url=qdrant_url)
 
-try:
-    qdrant_client.create_collection(
-        collection_name=JOB_COLLECTION,
-        vectors_config=VectorParams(size=1024, distance=Distance.COSINE),
-    )
-except UnexpectedResponse:
-    pass
+class LazyClient(Generic[T]):
+    """
+    Stands for a client created on first use, so that importing this module neither needs the services' env nor connects to them.
+    The client is created once per process and shared, along with its connection pool, by every caller.
+    Attribute names are prefixed so that they never shadow the ones of the client, e.g. the get method of redis clients.
+    """
 
-if (redis_url := os.getenv("REDIS_URL")) is None:
-    raise Exception("REDIS_URL is not set")
-redis_client = redis.Redis.from_url(redis_url)
+    def __init__(self, factory: Callable[[], T]):
+        self._lazy_factory = factory
+        self._lazy_client: T | None = None
+        self._lazy_lock = threading.Lock()
 
+    def _lazy_get(self) -> T:
+        if self._lazy_client is None:
+            with self._lazy_lock:
+                if self._lazy_client is None:
+                    self._lazy_client = self._lazy_factory()
+        return self._lazy_client
 
-async_mistral_client = MistralAsyncClient(api_key=os.getenv("MISTRAL_API_KEY"), timeout=5)
-mistral_client = MistralClient(api_key=os.getenv("MISTRAL_API_KEY"))
-async_redis_client = Redis.from_url(redis_url)
+    def _lazy_created(self) -> bool:
+        return self._lazy_client is not None
+
+    def __getattr__(self, name: str):
+        return getattr(self._lazy_get(), name)
+
+
+def _require_env(name: str) -> str:
+    if (value := os.getenv(name)) is None:
+        raise Exception(f"{name} env variable is not set")
+    return value
+
+
+qdrant_client: QdrantClient = LazyClient(lambda: QdrantClient(url=_require_env("QDRANT_URL")))  # type: ignore[assignment]
+async_qdrant_client: AsyncQdrantClient = LazyClient(lambda: AsyncQdrantClient(url=_require_env("QDRANT_URL")))  # type: ignore[assignment]
+redis_client: redis.Redis = LazyClient(lambda: redis.Redis.from_url(_require_env("REDIS_URL")))  # type: ignore[assignment]
+async_redis_client: Redis = LazyClient(lambda: Redis.from_url(_require_env("REDIS_URL")))  # type: ignore[assignment]
+# Embedding vectors live in their own Redis, bounded and evicted LRU, so that they never compete for memory with the queues and
+# the scrape state of REDIS_URL. Without EMBEDDING_REDIS_URL, e.g. in development, they share REDIS_URL.
+embedding_redis_client: redis.Redis = LazyClient(  # type: ignore[assignment]
+    lambda: redis.Redis.from_url(os.getenv("EMBEDDING_REDIS_URL") or _require_env("REDIS_URL"))
+)
+async_embedding_redis_client: Redis = LazyClient(  # type: ignore[assignment]
+    lambda: Redis.from_url(os.getenv("EMBEDDING_REDIS_URL") or _require_env("REDIS_URL"))
+)
+async_mistral_client: MistralAsyncClient = LazyClient(  # type: ignore[assignment]
+    lambda: MistralAsyncClient(api_key=os.getenv("MISTRAL_API_KEY"), timeout=5)
+)
+mistral_client: MistralClient = LazyClient(lambda: MistralClient(api_key=os.getenv("MISTRAL_API_KEY")))  # type: ignore[assignment]
+
+VECTORS_CONFIG = VectorParams(size=1024, distance=Distance.COSINE)
+
+
+def create_collections(*collection_names: str) -> None:
+    """Startup hook creating the missing collections, it can run any number of times and from several processes at once."""
+    for collection_name in collection_names:
+        if qdrant_client.collection_exists(collection_name):
+            continue
+        try:
+            qdrant_client.create_collection(collection_name=collection_name, vectors_config=VECTORS_CONFIG)
+        except UnexpectedResponse:
+            # Created by another process in between
+            pass
+
+
+async def acreate_collections(*collection_names: str) -> None:
+    for collection_name in collection_names:
+        if await async_qdrant_client.collection_exists(collection_name):
+            continue
+        try:
+            await async_qdrant_client.create_collection(collection_name=collection_name, vectors_config=VECTORS_CONFIG)
+        except UnexpectedResponse:
+            pass
@@ -6,8 +6,8 @@ from uuid import uuid4
 
 from mistralai.client import MistralClient
 from mistralai.models.chat_completion import ChatMessage, FunctionCall, ToolCall
-from mistralai.models.embeddings import EmbeddingResponse
 from django.template.loader import render_to_string
+from aiden_shared.embeddings import embedding_store
 
 from aiden_app.services.tools.talk_tool import TalkTool
 from aiden_app.models import ToolMessage
@@ -77,8 +77,8 @@ class MistralAgent(Agent):
 
         return message
 
-    def embed(self, message: str) -> EmbeddingResponse:
-        return self.client.embeddings(model="mistral-embed", input=message)
+    def embed(self, message: str) -> list[float]:
+        return embedding_store.embed([message])[0]
 
     def format_no_tool_call_message(self, message: ChatMessage) -> ToolMessage:
         return ToolMessage(
@@ -83,8 +83,7 @@ def create_profile(profile_data: dict, form_data: dict, request):
     agent = MistralAgent()
     profile_info = agent.create_profile(profile_data)
     profile = form_data
-    embeddings = agent.embed(profile_data["profile_info"])
-    embeddings_vector = embeddings.data[0].embedding
+    embeddings_vector = agent.embed(profile_data["profile_info"])
     profile_embeddings_uuid = str(uuid4())
     qdrant_client.upload_points(
         collection_name=USER_COLLECTION,
@@ -144,8 +143,7 @@ def get_offer_focus(request, job_offer: JobOffer):
     base_profile = get_profile_from_session(request)
     if "resume" in fields:
         new_profile_info = agent.edit_profile(base_profile.profile_info.to_json(), job_offer.model_dump())
-        embeddings = agent.embed(json.dumps(new_profile_info))
-        embeddings_vector = embeddings.data[0].embedding
+        embeddings_vector = agent.embed(json.dumps(new_profile_info))
         profile_embeddings_uuid = str(uuid4())
         qdrant_client.upload_points(
             collection_name=USER_COLLECTION,
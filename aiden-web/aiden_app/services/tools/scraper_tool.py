@@ -4,65 +4,26 @@ from uuid import UUID, uuid4
 
 import markdown2
 import httpx
-import time
 
 from aiden_app.models import ToolMessage
 from aiden_app.services.tools.tool import Tool
-from aiden_shared.models import ScrapeStatus, JobOffer
-from aiden_shared.tools import qdrant_client, mistral_client, JOB_COLLECTION
-from mistralai.models.embeddings import EmbeddingObject
+from aiden_shared.models import JobOffer, RankedJobOffer
 from django.template.loader import render_to_string
 
 
 class ScraperTool(Tool):
     base_url = os.environ.get("RECOMMENDER_API_URL")
 
-    scrape_url = f"{base_url}/scrape"
-    scrape_status_url = f"{base_url}/scrape_status/{{scrape_id}}"
-
-    job_response_interval = 1
+    scrape_stream_url = f"{base_url}/scrape/stream"
+    # The recommender pushes offers while the scrape runs, the stream stays open up to its scrape timeout
+    scrape_stream_timeout = httpx.Timeout(3, read=30)
 
     num_offers_per_search = 15
 
     def __init__(self, profile_embedding_id: UUID) -> None:
         super().__init__("ScraperTool")
         self.add_tool("search_jobs", self.search_jobs_agent_wrapper)
-        self.user_profile = qdrant_client.rest.points_api.get_point(collection_name="user_profile", id=str(profile_embedding_id)).result
-
-    def _get_search_query_vector(self, search_query: str) -> list[EmbeddingObject]:
-        return mistral_client.embeddings(model="mistral-embed", input=[search_query]).data
-
-    def get_scrape_status(self, scrape_id: UUID) -> ScrapeStatus:
-        response = httpx.get(url=self.scrape_status_url.format(scrape_id=scrape_id), timeout=3)
-        response.raise_for_status()
-        return response.json()["status"]
-
-    def get_next_job_recommendation(self, scrape_id: UUID, search_query: str, location: str) -> str:
-        user_profile_vector = self.user_profile.vector
-        search_query_vector = self._get_search_query_vector(search_query + " " + location)[0].embedding
-        search_vector = [a + (b * 0.5) for a, b in zip(search_query_vector, user_profile_vector)]
-
-        filter_condition = {"must_not": [{"key": "reference", "match": {"any": self.data.get("returned_offers", [])}}]}
-
-        response = qdrant_client.search(
-            collection_name=JOB_COLLECTION,
-            query_vector=search_vector,
-            query_filter=filter_condition,
-            limit=1,
-            with_vectors=False,
-            with_payload=True,
-        )
-
-        if not response:
-            return None  # No more unique job offers available
-
-        job_offer = JobOffer(**response[0].payload)
-
-        if "returned_offers" not in self.data.keys():
-            self.data["returned_offers"] = []
-        self.data["returned_offers"].append(job_offer.reference)
-
-        return job_offer
+        self.profile_embedding_id = profile_embedding_id
 
     def format_user_message(self, job_offer: JobOffer) -> str:
         if job_offer.profile is not None:
@@ -118,30 +79,26 @@ class ScraperTool(Tool):
             start_index = self.data[container_id]["offers_seen"]
         else:
             start_index = 0
-        paylaod = {"location": location, "query": search_query, "limit": self.num_offers_per_search, "start_index": start_index}
-        response = httpx.post(url=self.scrape_url, json=paylaod, timeout=3)
-        response.raise_for_status()
-        scrape_id = response.json()["scrape_id"]
+        paylaod = {
+            "location": location,
+            "query": search_query,
+            "limit": self.num_offers_per_search,
+            "start_index": start_index,
+            "profile_id": str(self.profile_embedding_id),
+            "exclude": self.data.get("returned_offers", []),
+        }
         grid_id = uuid4().hex
         yield self.get_grid_message(grid_id, page_number, container_id)
         jobs_found = []
-        for i in range(self.num_offers_per_search):
-            status = self.get_scrape_status(scrape_id)
-            if status != ScrapeStatus.FINISHED:
-                next_job = self.get_next_job_recommendation(scrape_id, search_query, location)
-                if next_job is None:
-                    break
+        with httpx.stream("POST", url=self.scrape_stream_url, json=paylaod, timeout=self.scrape_stream_timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                next_job = RankedJobOffer.model_validate_json(line).job_offer
+                self.data.setdefault("returned_offers", []).append(next_job.reference)
                 jobs_found.append(next_job)
                 yield self.pack_message_user(next_job, grid_id)
-                time.sleep(self.job_response_interval)
-            else:
-                for _ in range(i, self.num_offers_per_search):
-                    next_job = self.get_next_job_recommendation(scrape_id, search_query, location)
-                    if next_job is None:
-                        break
-                    jobs_found.append(next_job)
-                    yield self.pack_message_user(next_job, grid_id)
-                break
         yield self.pack_message_agent(jobs_found)
         self.add_to_memory(search_query, location, container_id, self.num_offers_per_search)
 
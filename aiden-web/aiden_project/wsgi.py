@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "aiden_project.settings")
 
 application = get_wsgi_application()
+
+from aiden_app import on_startup  # noqa: E402, needs the settings loaded by get_wsgi_application
+
+on_startup()